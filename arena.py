@@ -0,0 +1,186 @@
+import argparse
+import ast
+import inspect
+import math
+import os
+import sys
+import time
+import concurrent.futures
+import chess #to help with chess rules
+import chess.pgn
+from chess_engine import ChessBot, MAX_PLY
+
+#plays two configurations of the bot against each other without the GUI, to tell whether a change makes it stronger
+#python arena.py --games 200 --time 0.1 --a "lmr=False" --b "lmr=True" --pgn games.pgn
+
+#balanced positions a few moves into common openings, each one is played twice with the colours swapped
+OPENING_FENS = [
+    ("Italian", "r1bqk1nr/pppp1ppp/2n5/2b1p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4"),
+    ("Ruy Lopez", "r1bqkbnr/1ppp1ppp/p1n5/1B2p3/4P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 0 4"),
+    ("Sicilian", "rnbqkb1r/pp2pppp/3p1n2/8/3NP3/8/PPP2PPP/RNBQKB1R w KQkq - 1 5"),
+    ("French", "rnbqkbnr/ppp2ppp/4p3/3pP3/3P4/8/PPP2PPP/RNBQKBNR b KQkq - 0 3"),
+    ("Caro-Kann", "rnbqkbnr/pp2pppp/2p5/3p4/3PP3/8/PPP2PPP/RNBQKBNR w KQkq - 0 3"),
+    ("Scandinavian", "rnb1kbnr/ppp1pppp/8/q7/8/2N5/PPPP1PPP/R1BQKBNR w KQkq - 2 4"),
+    ("Queen's Gambit Declined", "rnbqkb1r/ppp2ppp/4pn2/3p4/2PP4/2N5/PP2PPPP/R1BQKBNR w KQkq - 2 4"),
+    ("Slav", "rnbqkb1r/pp2pppp/2p2n2/3p4/2PP4/5N2/PP2PPPP/RNBQKB1R w KQkq - 2 4"),
+    ("King's Indian", "rnbqk2r/ppp1ppbp/3p1np1/8/2PPP3/2N5/PP3PPP/R1BQKBNR w KQkq - 0 5"),
+    ("Nimzo-Indian", "rnbqk2r/pppp1ppp/4pn2/8/1bPP4/2N5/PP2PPPP/R1BQKBNR w KQkq - 2 4"),
+    ("English", "rnbqkbnr/pppp1ppp/8/4p3/2P5/2N5/PP1PPPP1/R1BQKBNR b KQkq - 0 2"),
+    ("London", "rnbqkb1r/ppp1pppp/5n2/3p4/3P1B2/5N2/PPP1PPPP/RN1QKB1R b KQkq - 3 3"),
+]
+#depth each move is searched to when no time or node limit is given
+ARENA_DEPTH = 3
+
+#turns "null_move=False,lmr=False" into ChessBot keyword arguments, values are Python literals or plain strings
+def parse_config(text):
+    options = {}
+    parameters = inspect.signature(ChessBot).parameters
+    for item in text.split(","):
+        if not item.strip():
+            continue
+        name, value = item.split("=", 1)
+        name = name.strip()
+        if name not in parameters or name == "colour":
+            raise ValueError("ChessBot has no option " + name)
+        try:
+            options[name] = ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            options[name] = value.strip()
+    return options
+
+#plays one game from fen, configs map each colour to (name, ChessBot keyword arguments)
+#returns the game's PGN, result and each colour's move times and nodes
+def play_game(round_number, opening, fen, configs, max_depth, time_limit, node_limit):
+    board = chess.Board(fen)
+    bots = {}
+    for colour in chess.COLORS:
+        options = {"book_path": None}
+        options.update(configs[colour][1])
+        bots[colour] = ChessBot(colour, **options)
+    move_times = {chess.WHITE: [], chess.BLACK: []}
+    move_nodes = {chess.WHITE: [], chess.BLACK: []}
+
+    #the checks the GUI ends a game with, fivefold repetition and seventy-five moves adjudicate the draws that would go on forever
+    while not (board.is_checkmate() or board.is_stalemate() or board.is_insufficient_material() or
+               board.is_fivefold_repetition() or board.is_seventyfive_moves()):
+        bot = bots[board.turn]
+        start = time.perf_counter()
+        score, move = bot.search(board, max_depth, time_limit, node_limit)
+        move_times[board.turn].append(time.perf_counter() - start)
+        move_nodes[board.turn].append(bot.positions + bot.q_positions)
+        board.push(move)
+    for bot in bots.values():
+        bot.close()
+
+    game = chess.pgn.Game.from_board(board)
+    game.headers["Event"] = "Chess Bot arena"
+    game.headers["Date"] = time.strftime("%Y.%m.%d")
+    game.headers["Round"] = str(round_number)
+    game.headers["White"] = configs[chess.WHITE][0]
+    game.headers["Black"] = configs[chess.BLACK][0]
+    game.headers["Opening"] = opening
+    game.headers["Termination"] = board.outcome().termination.name.lower().replace("_", " ")
+    stats = {}
+    for colour in chess.COLORS:
+        times, nodes = move_times[colour], move_nodes[colour]
+        stats[colour] = {"moves": len(times), "nodes": sum(nodes), "time": sum(times),
+                         "nps": sum(nodes) / sum(times) if sum(times) > 0 else 0,
+                         "latency": sum(times) / len(times) if times else 0, "max_latency": max(times, default=0)}
+        side = "White" if colour else "Black"
+        game.headers[side + "NPS"] = str(round(stats[colour]["nps"]))
+        game.headers[side + "Latency"] = str(round(stats[colour]["latency"], 3))
+    return {"round": round_number, "pgn": str(game), "result": board.result(), "white": configs[chess.WHITE][0],
+            "black": configs[chess.BLACK][0], "termination": game.headers["Termination"], "stats": stats}
+
+#Elo difference for a score between 0 and 1
+def elo(score):
+    if score <= 0 or score >= 1:
+        return math.copysign(math.inf, score - 0.5)
+    return -400 * math.log10(1 / score - 1)
+
+#Elo difference of the first engine and its 95% confidence margin, from its score in each game (1, 0.5 or 0)
+def elo_estimate(scores):
+    n = len(scores)
+    mean = sum(scores) / n
+    deviation = math.sqrt(sum((score - mean) ** 2 for score in scores) / n / n)
+    return elo(mean), (elo(min(mean + 1.96 * deviation, 1)) - elo(max(mean - 1.96 * deviation, 0))) / 2
+
+#an Elo difference rounded for printing, a score of 0 or 1 gives an infinite one
+def format_elo(difference):
+    return str(difference) if math.isinf(difference) or math.isnan(difference) else str(round(difference))
+
+#plays the games over a pool of processes, writes them to the PGN file and prints each game and the totals
+#each opening is played once with each engine as white, returns the first engine's scores
+def run(games, config_a, config_b, max_depth, time_limit, node_limit, workers, pgn_path=None):
+    names = ("A " + (config_a[0] or "default"), "B " + (config_b[0] or "default"))
+    engines = {names[0]: config_a[1], names[1]: config_b[1]}
+    scores = []
+    totals = {name: {"nodes": 0, "time": 0, "moves": 0, "max_latency": 0} for name in names}
+    pgn = open(pgn_path, "w") if pgn_path is not None else None
+    start = time.time()
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for i in range(games):
+            opening, fen = OPENING_FENS[i // 2 % len(OPENING_FENS)]
+            white, black = names if i % 2 == 0 else names[::-1]
+            configs = {chess.WHITE: (white, engines[white]), chess.BLACK: (black, engines[black])}
+            futures.append(pool.submit(play_game, i + 1, opening, fen, configs, max_depth, time_limit, node_limit))
+
+        for future in concurrent.futures.as_completed(futures):
+            game = future.result()
+            if pgn is not None:
+                pgn.write(game["pgn"] + "\n\n")
+                pgn.flush()
+            points = {"1-0": 1, "0-1": 0}.get(game["result"], 0.5)
+            scores.append(points if game["white"] == names[0] else 1 - points)
+            for colour, side in ((chess.WHITE, "white"), (chess.BLACK, "black")):
+                stats = game["stats"][colour]
+                total = totals[game[side]]
+                total["nodes"] += stats["nodes"]
+                total["time"] += stats["time"]
+                total["moves"] += stats["moves"]
+                total["max_latency"] = max(total["max_latency"], stats["max_latency"])
+            white, black = game["stats"][chess.WHITE], game["stats"][chess.BLACK]
+            print("game", str(game["round"]).rjust(4), game["white"], "-", game["black"], game["result"].ljust(7),
+                  game["termination"].ljust(20), "nodes/s", round(white["nps"]), "/", round(black["nps"]),
+                  "latency", str(round(white["latency"], 3)) + "s /", str(round(black["latency"], 3)) + "s")
+            sys.stdout.flush()
+
+    if pgn is not None:
+        pgn.close()
+    wins, draws = scores.count(1), scores.count(0.5)
+    difference, margin = elo_estimate(scores)
+    print()
+    print(names[0], "against", names[1] + ":", wins, "wins", draws, "draws", len(scores) - wins - draws, "losses",
+          "score", str(round(sum(scores) / len(scores) * 100, 1)) + "%", "Elo", format_elo(difference), "+/-", format_elo(margin),
+          "in", str(round(time.time() - start)) + "s")
+    for name in names:
+        total = totals[name]
+        print(name.ljust(30), "nodes/s", round(total["nodes"] / total["time"]) if total["time"] > 0 else 0,
+              "average latency", str(round(total["time"] / max(total["moves"], 1), 3)) + "s",
+              "max latency", str(round(total["max_latency"], 3)) + "s")
+    return scores
+
+def main():
+    parser = argparse.ArgumentParser(description="Plays two configurations of the bot against each other from a set of openings.")
+    parser.add_argument("--a", default="", help="ChessBot options of the first engine, such as \"null_move=False,lmr=False\"")
+    parser.add_argument("--b", default="", help="ChessBot options of the second engine")
+    parser.add_argument("--games", type=int, default=2 * len(OPENING_FENS), help="games to play, the openings are cycled through in pairs")
+    parser.add_argument("--depth", type=int, help="depth to search each move to, " + str(ARENA_DEPTH) + " if there is no time or node limit")
+    parser.add_argument("--time", type=float, help="seconds per move")
+    parser.add_argument("--nodes", type=int, help="positions per move")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="games played at once")
+    parser.add_argument("--pgn", help="file to write the games to")
+    args = parser.parse_args()
+
+    if args.depth is not None:
+        max_depth = args.depth
+    else:
+        max_depth = MAX_PLY if args.time is not None or args.nodes is not None else ARENA_DEPTH
+    config_a = (args.a, parse_config(args.a))
+    config_b = (args.b, parse_config(args.b))
+    run(args.games, config_a, config_b, max_depth, args.time, args.nodes, args.workers, args.pgn)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,508 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+import chess #to help with chess rules
+from chess_engine import ChessBot, SearchBoard, BatchEvaluator, MAX_PLY
+from engine_service import EngineService, ServiceBusy
+from arena import parse_config
+
+#headless benchmarks for the engine, run with python benchmarks.py <benchmark>
+
+#positions are taken from random games so each run measures the same mix of openings, middlegames and endings
+POSITION_SEED = 0
+POSITION_COUNT = 1000
+#how many plies each random game is played for at most
+GAME_LENGTH = 120
+
+#plays random games from the starting position and keeps every position along the way
+def random_positions(count=POSITION_COUNT, seed=POSITION_SEED):
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = chess.Board()
+        for i in range(GAME_LENGTH):
+            moves = [move for move in board.legal_moves]
+            if not moves or len(positions) >= count:
+                break
+            board.push(rng.choice(moves))
+            positions.append(board.copy(stack=False))
+    return positions
+
+#runs evaluate once for every position, repeated until at least min_time seconds have passed
+#returns evaluations per second
+def time_evaluations(evaluate, positions, min_time):
+    evaluations = 0
+    start = time.perf_counter()
+    while True:
+        for position in positions:
+            evaluate(position)
+        evaluations += len(positions)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return evaluations / elapsed
+
+#leaf evaluations per second of the ways the bot can score a position
+#  incremental: material and PST totals kept by the search board, what the search uses without the bitboard terms
+#  search: the incremental totals plus mobility and king safety from the bitboards, what the search uses by default
+#  bitboards: everything worked out from the bitboards, with no search board
+#  rebuild: a search board built from scratch for every position, the cost of evaluating without incremental updates
+def benchmark_eval(count=POSITION_COUNT, min_time=1.0):
+    positions = random_positions(count)
+    search_boards = {id(position): SearchBoard(position) for position in positions}
+    bot = ChessBot(chess.WHITE)
+    simple_bot = ChessBot(chess.WHITE, bitboard_eval=False)
+
+    #the bitboard evaluation has to agree with the search before its speed means anything
+    for position in positions:
+        assert bot.evaluate_bitboards(position) == bot.evaluate_board(position, search_boards[id(position)]), position.fen()
+        assert simple_bot.evaluate_bitboards(position) == simple_bot.evaluate_board(position, search_boards[id(position)]), position.fen()
+
+    results = {
+        "incremental": time_evaluations(lambda position: simple_bot.evaluate_board(position, search_boards[id(position)]), positions, min_time),
+        "search": time_evaluations(lambda position: bot.evaluate_board(position, search_boards[id(position)]), positions, min_time),
+        "bitboards": time_evaluations(bot.evaluate_bitboards, positions, min_time),
+        "bitboards (no activity)": time_evaluations(simple_bot.evaluate_bitboards, positions, min_time),
+        "rebuild": time_evaluations(lambda position: simple_bot.evaluate_board(position, SearchBoard(position)), positions, min_time),
+    }
+    print("positions:", len(positions))
+    for name, rate in results.items():
+        print(name.ljust(24), str(round(rate)).rjust(10), "evals/s")
+    return results
+
+#batch sizes the batched evaluation is timed at
+BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096]
+#depth of the searches compared with and without batched evaluation
+BATCH_SEARCH_DEPTH = 3
+
+#throughput of batched evaluation at each batch size against evaluating one position at a time
+#the crossover is the smallest batch size where the batch beats summing the material and PST of each position in Python
+#the search board totals are also shown, since the search keeps them up to date as it goes and never needs either
+def benchmark_batch(count=POSITION_COUNT, min_time=1.0):
+    positions = random_positions(count)
+    search_boards = [SearchBoard(position) for position in positions]
+    bot = ChessBot(chess.WHITE, bitboard_eval=False)
+    batch = BatchEvaluator(chess.WHITE, False)
+
+    #the batch has to give the same scores as the search before its speed means anything
+    for sb in search_boards:
+        batch.add(sb.squares)
+    assert batch.evaluate() == [bot.evaluate_pieces(sb) + bot.evaluate_position(sb) for sb in search_boards]
+
+    #the same sum the batch works out, done in Python for one position at a time
+    weights = batch.weights.tolist()
+    def evaluate_squares(sb):
+        return sum([weights[code + 6][square] for square, code in enumerate(sb.squares) if code != 0])
+    scratch_rate = time_evaluations(evaluate_squares, search_boards, min_time)
+    incremental_rate = time_evaluations(lambda sb: bot.evaluate_pieces(sb) + bot.evaluate_position(sb), search_boards, min_time)
+    print("per position, from scratch".ljust(28), str(round(scratch_rate)).rjust(10), "evals/s")
+    print("per position, incremental".ljust(28), str(round(incremental_rate)).rjust(10), "evals/s")
+
+    results = {"scratch": scratch_rate, "incremental": incremental_rate, "batch": {}, "crossover": None}
+    for size in BATCH_SIZES:
+        #the same positions are used over and over to fill batches bigger than the position set
+        squares = [search_boards[i % len(search_boards)].squares for i in range(size)]
+        def run_batch(squares_list):
+            for position_squares in squares_list:
+                batch.add(position_squares)
+            batch.evaluate()
+        rate = time_evaluations(run_batch, [squares], min_time) * size
+        results["batch"][size] = rate
+        if results["crossover"] is None and rate > scratch_rate:
+            results["crossover"] = size
+        print(("batch of " + str(size)).ljust(28), str(round(rate)).rjust(10), "evals/s")
+    print("crossover batch size:", results["crossover"])
+
+    #the search gives the same result either way, only the speed changes
+    searches = {}
+    for batch_eval in (False, True):
+        search_results = []
+        nodes = 0
+        start = time.perf_counter()
+        for position in positions[:20]:
+            search_bot = ChessBot(position.turn, batch_eval=batch_eval, book_path=None)
+            score, move = search_bot.search(position, BATCH_SEARCH_DEPTH)
+            nodes += search_bot.positions + search_bot.q_positions
+            search_results.append((score, move, search_bot.positions))
+        elapsed = time.perf_counter() - start
+        searches[batch_eval] = search_results
+        name = "search, batched" if batch_eval else "search, per node"
+        results[name] = nodes / elapsed
+        print(name.ljust(28), str(round(nodes / elapsed)).rjust(10), "nodes/s")
+    assert searches[False] == searches[True]
+    return results
+
+#fixed positions for the search benchmark, bump SUITE_VERSION whenever they change so old baselines are not compared against them
+SUITE_VERSION = 1
+SUITE_POSITIONS = [
+    ("start", "opening", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"),
+    ("sicilian", "opening", "rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2"),
+    ("queens gambit", "opening", "rnbqkbnr/ppp1pppp/8/3p4/2PP4/8/PP2PPPP/RNBQKBNR b KQkq - 0 2"),
+    ("italian", "middlegame", "r1bq1rk1/pppp1ppp/2n2n2/2b1p3/2B1P3/2PP1N2/PP3PPP/RNBQ1RK1 w - - 1 7"),
+    ("kiwipete", "middlegame", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"),
+    ("closed centre", "middlegame", "r2q1rk1/pp2bppp/2n1pn2/3p4/3P4/2NBPN2/PP3PPP/R2Q1RK1 w - - 0 10"),
+    ("back rank mate", "tactic", "6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1"),
+    ("knight fork", "tactic", "8/4k3/8/q7/3N4/8/8/7K w - - 0 1"),
+    ("hanging queen", "tactic", "rnb1kbnr/pppp1ppp/8/4p3/4P2q/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"),
+    ("rook ending", "endgame", "8/8/4k3/8/2R5/4K3/4P3/6r1 w - - 0 1"),
+    ("pawn race", "endgame", "8/5p2/8/8/8/8/1P6/k6K w - - 0 1"),
+    ("minor pieces", "endgame", "8/4kp2/6p1/3n4/8/4BP2/5KP1/8 w - - 0 1"),
+]
+#depth every suite position is searched to
+SUITE_DEPTH = 4
+#fraction of the baseline nodes per second a run can drop by before it counts as a regression
+NPS_TOLERANCE = 0.1
+
+#searches every suite position to a fixed depth with a fresh bot, without the opening book or bitbases
+#so the result only depends on the search and evaluation
+#options are ChessBot keyword arguments, such as {"pvs": False} to measure what a search feature saves
+def run_suite(depth=SUITE_DEPTH, options=None):
+    options = options or {}
+    results = []
+    for name, category, fen in SUITE_POSITIONS:
+        board = chess.Board(fen)
+        bot = ChessBot(board.turn, book_path=None, bitbase_dir=None, **options)
+        start = time.perf_counter()
+        score, move = bot.search(board, depth)
+        elapsed = time.perf_counter() - start
+        nodes = bot.positions + bot.q_positions
+        results.append({"name": name, "category": category, "fen": fen, "depth": bot.depth_reached,
+                        "nodes": nodes, "time": elapsed, "nps": nodes / elapsed if elapsed > 0 else 0,
+                        "move": move.uci() if move is not None else None, "score": score})
+        print(name.ljust(16), category.ljust(12), str(results[-1]["move"]).ljust(6), str(score).rjust(7),
+              str(nodes).rjust(9), "nodes", str(round(results[-1]["nps"])).rjust(8), "nodes/s")
+
+    nodes = sum(result["nodes"] for result in results)
+    elapsed = sum(result["time"] for result in results)
+    print("total".ljust(36), str(nodes).rjust(16), "nodes", str(round(nodes / elapsed)).rjust(8), "nodes/s")
+    return {"suite_version": SUITE_VERSION, "depth": depth, "options": options, "python": platform.python_version(),
+            "machine": platform.machine(), "positions": results,
+            "total": {"nodes": nodes, "time": elapsed, "nps": nodes / elapsed if elapsed > 0 else 0}}
+
+#compares a run with a baseline run, returns the problems found, an empty list if there are none
+#a different best move on any position or the total nodes per second dropping by more than the tolerance is a regression
+def compare_suite(run, baseline, nps_tolerance=NPS_TOLERANCE):
+    if run["suite_version"] != baseline["suite_version"] or run["depth"] != baseline["depth"] or run["options"] != baseline.get("options", {}):
+        return ["baseline is for suite version " + str(baseline["suite_version"]) + " at depth " + str(baseline["depth"]) +
+                " with options " + str(baseline.get("options", {}))]
+    problems = []
+    baseline_positions = {result["name"]: result for result in baseline["positions"]}
+    for result in run["positions"]:
+        before = baseline_positions.get(result["name"])
+        if before is None:
+            continue
+        if result["move"] != before["move"]:
+            problems.append(result["name"] + ": best move changed from " + str(before["move"]) + " to " + str(result["move"]))
+        if result["nodes"] != before["nodes"]:
+            #fewer or more nodes is expected when the search changes, so is only reported
+            print(result["name"] + ": nodes changed from " + str(before["nodes"]) + " to " + str(result["nodes"]))
+    nps, baseline_nps = run["total"]["nps"], baseline["total"]["nps"]
+    print("nodes/s", round(nps), "against a baseline of", round(baseline_nps), "(" + str(round((nps / baseline_nps - 1) * 100, 1)) + "%)")
+    if nps < baseline_nps * (1 - nps_tolerance):
+        problems.append("nodes per second dropped from " + str(round(baseline_nps)) + " to " + str(round(nps)))
+    return problems
+
+#runs the suite, saves it and gates it against a baseline, returns the exit code
+def benchmark_suite(depth=SUITE_DEPTH, output=None, baseline=None, save_baseline=None, nps_tolerance=NPS_TOLERANCE, options=None):
+    run = run_suite(depth, options)
+    if output is not None:
+        with open(output, "w") as f:
+            json.dump(run, f, indent=2)
+    if save_baseline is not None:
+        with open(save_baseline, "w") as f:
+            json.dump(run, f, indent=2)
+    if baseline is not None:
+        with open(baseline) as f:
+            problems = compare_suite(run, json.load(f), nps_tolerance)
+        for problem in problems:
+            print("REGRESSION:", problem)
+        if problems:
+            return 1
+    return 0
+
+#tactical positions with their best moves, the first ten are from the Win At Chess test suite
+TACTIC_POSITIONS = [
+    ("WAC.001", "2rr3k/pp3pp1/1nnqbN1p/3pN3/2pP4/2P3Q1/PPB4P/R4RK1 w - - 0 1", ["Qg6"]),
+    ("WAC.002", "8/7p/5k2/5p2/p1p2P2/Pr1pPK2/1P1R3P/8 b - - 0 1", ["Rxb2"]),
+    ("WAC.003", "5rk1/1ppb3p/p1pb4/6q1/3P1p1r/2P1R2P/PP1BQ1P1/5RKN w - - 0 1", ["Rg3"]),
+    ("WAC.004", "r1bq2rk/pp3pbp/2p1p1pQ/7P/3P4/2PB1N2/PP3PPR/2KR4 w - - 0 1", ["Qxh7+"]),
+    ("WAC.005", "5k2/6pp/p1qN4/1p1p4/3P4/2PKP2Q/PP3r2/3R4 b - - 0 1", ["Qc4+"]),
+    ("WAC.006", "7k/p7/1R5K/6r1/6p1/6P1/8/8 w - - 0 1", ["Rb7"]),
+    ("WAC.007", "rnbqkb1r/pppp1ppp/8/4P3/6n1/7P/PPPNPPP1/R1BQKBNR b KQkq - 0 1", ["Ne3"]),
+    ("WAC.008", "r4q1k/p2bR1rp/2p2Q1N/5p2/5p2/2P5/PP3PPP/R5K1 w - - 0 1", ["Rf7"]),
+    ("WAC.009", "3q1rk1/p4pp1/2pb3p/3p4/6Pr/1PNQ4/P1PB1PP1/4RRK1 b - - 0 1", ["Bh2+"]),
+    ("WAC.010", "2br2k1/2q3rn/p2NppQ1/2p1P3/Pp5R/4P3/1P3PPP/3R2K1 w - - 0 1", ["Rh7"]),
+    ("back rank mate", "6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1", ["Ra8#"]),
+    ("knight fork", "8/4k3/8/q7/3N4/8/8/7K w - - 0 1", ["Nc6+"]),
+    ("hanging queen", "rnb1kbnr/pppp1ppp/8/4p3/4P2q/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3", ["Nxh4"]),
+]
+#depth the full-width search is timed at, the selective search then gets the same time for each position
+TACTIC_DEPTH = 4
+
+#searches each tactical position to a fixed depth without null move pruning or late move reductions,
+#then gives the selective search the same time, and reports how deep each got and which positions each solved
+def benchmark_tactics(depth=TACTIC_DEPTH):
+    totals = {"full": [0, 0], "selective": [0, 0]}
+    for name, fen, best_moves in TACTIC_POSITIONS:
+        board = chess.Board(fen)
+        best = [board.parse_san(san) for san in best_moves]
+
+        bot = ChessBot(board.turn, book_path=None, bitbase_dir=None, null_move=False, lmr=False)
+        start = time.perf_counter()
+        score, move = bot.search(board, depth)
+        elapsed = time.perf_counter() - start
+        full = (bot.depth_reached, move in best)
+
+        selective_bot = ChessBot(board.turn, book_path=None, bitbase_dir=None, null_move=True, lmr=True)
+        score, selective_move = selective_bot.search(board, MAX_PLY, elapsed)
+        selective = (selective_bot.depth_reached, selective_move in best)
+
+        for key, (reached, solved) in (("full", full), ("selective", selective)):
+            totals[key][0] += reached
+            totals[key][1] += solved
+        print(name.ljust(16), str(round(elapsed, 2)).rjust(6) + "s",
+              "full width: depth", full[0], move.uci(), "solved" if full[1] else "missed", "|",
+              "selective: depth", selective[0], selective_move.uci(), "solved" if selective[1] else "missed")
+
+    count = len(TACTIC_POSITIONS)
+    for key, (reached, solved) in totals.items():
+        print(key.ljust(10), "average depth", round(reached / count, 1), "solved", solved, "of", count)
+    return totals
+
+#worker processes the parallel search is timed with by default
+PARALLEL_WORKERS = os.cpu_count()
+
+#times the serial search against the parallel root search on every suite position at the same depth,
+#and checks that both pick the same move, process start up is not counted
+def benchmark_parallel(depth=SUITE_DEPTH, workers=PARALLEL_WORKERS):
+    serial_time = parallel_time = 0
+    same = 0
+    for name, category, fen in SUITE_POSITIONS:
+        board = chess.Board(fen)
+        result = ChessBot(board.turn, book_path=None, bitbase_dir=None).benchmark_parallel(board, depth, workers)
+        serial_time += result["serial_time"]
+        parallel_time += result["parallel_time"]
+        same += result["same_move"]
+        print(name.ljust(16), result["serial_move"].ljust(6), str(result["serial_score"]).rjust(7), result["parallel_move"].ljust(6),
+              str(result["parallel_score"]).rjust(7), str(round(result["serial_time"], 2)) + "s", str(round(result["parallel_time"], 2)) + "s",
+              result["serial_positions"], "/", result["parallel_positions"], "positions")
+    print("workers", workers, "depth", depth, "same move on", same, "of", len(SUITE_POSITIONS),
+          "speedup", round(serial_time / parallel_time, 2) if parallel_time > 0 else 0)
+
+#bot moves sent to the engine service at once, and the workers and queue it serves them with
+SERVICE_BURST = 8
+SERVICE_WORKERS = 2
+SERVICE_QUEUE = 2
+#depth the service searches each bot move to, kept small since the burst measures the queue and not the search
+SERVICE_DEPTH = 3
+SERVICE_FEN = "r1bq1rk1/pppp1ppp/2n2n2/2b1p3/2B1P3/2PP1N2/PP3PPP/RNBQ1RK1 w - - 1 7"
+
+#sends a burst of bot moves for separate games to the engine service at once and checks how many it accepts:
+#one for each free worker and one for each queue place, the rest are turned away as busy
+#returns 0 if the accepted count is right, 1 if not
+async def service_burst(burst, workers, max_queue, depth):
+    service = EngineService(workers, max_queue, None)
+    try:
+        #a middlegame out of the opening book, so every accepted move is searched
+        sessions = [service.new_game({"fen": SERVICE_FEN, "bot_colour": "white"})["session"] for i in range(burst)]
+        start = time.perf_counter()
+        results = await asyncio.gather(*[service.handle({"op": "bot_move", "session": session, "depth": depth, "time": None})
+                                         for session in sessions], return_exceptions=True)
+        elapsed = time.perf_counter() - start
+        metrics = service.metrics()
+    finally:
+        service.close()
+    accepted = sum(1 for result in results if isinstance(result, dict))
+    busy = sum(1 for result in results if isinstance(result, ServiceBusy))
+    expected = min(burst, workers + max_queue)
+    print("burst", burst, "workers", workers, "max queue", max_queue, "accepted", accepted, "busy", busy,
+          "time", str(round(elapsed, 2)) + "s", "rejected", metrics["rejected"], "table usage", metrics["tt_usage"])
+    if accepted != expected or busy != burst - expected:
+        print("FAILED: expected", expected, "accepted and", burst - expected, "busy")
+        return 1
+    return 0
+
+def benchmark_service(burst=SERVICE_BURST, workers=SERVICE_WORKERS, max_queue=SERVICE_QUEUE, depth=SERVICE_DEPTH):
+    return asyncio.run(service_burst(burst, workers, max_queue, depth))
+
+#window and board layout of the GUI in Chess Bot.py
+WINDOW_SIZE = (1400, 950)
+RENDER_FRAMES = 600
+#frames between the moves played in the moves scene
+FRAMES_PER_MOVE = 10
+
+#stand-ins for the GUI's squares and pieces with the attributes the renderer reads
+class BenchmarkSquare:
+    def __init__(self, x, y, colour):
+        self.x = x
+        self.y = y
+        self.size = 100
+        self.draw_col = colour
+
+class BenchmarkPiece:
+    def __init__(self, x, y, image):
+        self.x = x
+        self.y = y
+        self.img = image
+        self.rect = image.get_rect(topleft=(x, y))
+
+#times frames of the GUI drawn the old way (everything drawn and the whole window updated every frame)
+#against the renderer, on the SDL dummy video driver so it runs without a display
+#the piece images are plain shapes since the PNGs are not needed for timing
+def benchmark_render(frames=RENDER_FRAMES):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from renderer import Renderer
+    pygame.init()
+    screen = pygame.display.set_mode(WINDOW_SIZE)
+    font = pygame.font.SysFont('Comic Sans MS', 30)
+    square_font = pygame.font.SysFont('Comic Sans MS', 25)
+    light, dark, light_moved, dark_moved = "#f0dab5", "#b58763", "#cad76e", "#a1a23e"
+
+    images = {}
+    for symbol in "PNBRQKpnbrqk":
+        image = pygame.Surface((100, 100), pygame.SRCALPHA)
+        colour = (250, 250, 250) if symbol.isupper() else (20, 20, 20)
+        pygame.draw.circle(image, colour, (50, 50), 20 + 4 * "PNBRQK".index(symbol.upper()))
+        images[symbol] = image
+    button = pygame.Surface((150, 100))
+    button.fill((90, 90, 90))
+
+    def draw_background(surface, orientation):
+        surface.fill((0, 0, 0))
+        surface.blit(button, (950, 775))
+        surface.blit(button, (1150, 775))
+        for name, pos in (("Chess Bot", (50, 25)), ("Player", (50, 880)), ("New Game", (950, 725)), ("Undo", (1187, 725))):
+            surface.blit(font.render(name, False, (255, 255, 255)), pos)
+
+    def board_labels(orientation):
+        labels = []
+        for i in range(8):
+            colour = light if i % 2 == 0 else dark
+            labels.append((square_font.render("abcdefgh"[i], False, colour), (130 + i * 100, 835)))
+            labels.append((square_font.render("12345678"[i], False, colour), (55, 775 - i * 100)))
+        return labels
+
+    #the old game loop's drawing, kept here to compare against
+    def draw_everything(squares, pieces, dragged_piece, texts):
+        draw_background(screen, True)
+        for row in squares:
+            for square in row:
+                pygame.draw.rect(screen, square.draw_col, (square.x, square.y, square.size, square.size))
+        for surface, pos in board_labels(True):
+            screen.blit(surface, pos)
+        for row in pieces:
+            for piece in row:
+                if piece != 0 and piece is not dragged_piece:
+                    screen.blit(piece.img, (piece.x, piece.y))
+        if dragged_piece is not None:
+            screen.blit(dragged_piece.img, (dragged_piece.x, dragged_piece.y))
+        for text_font, text, pos in texts:
+            screen.blit(text_font.render(text, False, (255, 255, 255)), pos)
+        pygame.display.update()
+
+    def new_position():
+        squares = [[BenchmarkSquare(50 + col * 100, 75 + row * 100, light if (row + col) % 2 == 0 else dark) for col in range(8)] for row in range(8)]
+        pieces = [[0 for i in range(8)] for i in range(8)]
+        for row, rank in enumerate(chess.Board().board_fen().split("/")):
+            for col, symbol in enumerate(rank.replace("8", "........")):
+                if symbol != ".":
+                    pieces[row][col] = BenchmarkPiece(50 + col * 100, 75 + row * 100, images[symbol])
+        return squares, pieces
+
+    #moves a knight back and forth and marks the squares it moved between
+    def play_move(squares, pieces, frame):
+        (row, col), (new_row, new_col) = ((7, 6), (5, 5)) if (frame // FRAMES_PER_MOVE) % 2 == 0 else ((5, 5), (7, 6))
+        for r in range(8):
+            for c in range(8):
+                squares[r][c].draw_col = light if (r + c) % 2 == 0 else dark
+        for r, c in ((row, col), (new_row, new_col)):
+            squares[r][c].draw_col = light_moved if (r + c) % 2 == 0 else dark_moved
+        pieces[new_row][new_col] = BenchmarkPiece(50 + new_col * 100, 75 + new_row * 100, pieces[row][col].img)
+        pieces[row][col] = 0
+
+    scenes = ["idle", "drag", "moves"]
+    for scene in scenes:
+        times = {}
+        for name in ("full redraw", "renderer"):
+            squares, pieces = new_position()
+            renderer = Renderer(screen, draw_background, board_labels)
+            dragged_piece = pieces[7][1] if scene == "drag" else None
+            positions_searched = 0
+            start = time.perf_counter()
+            for frame in range(frames):
+                if scene == "drag":
+                    dragged_piece.x = 150 + (frame * 5) % 600
+                    dragged_piece.y = 775 - (frame * 3) % 600
+                elif scene == "moves" and frame % FRAMES_PER_MOVE == 0:
+                    play_move(squares, pieces, frame)
+                    positions_searched += 1234
+                texts = [(font, "White's turn.", (900, 75)), (font, str(positions_searched) + " positions evaluated.", (900, 150))]
+                if name == "full redraw":
+                    draw_everything(squares, pieces, dragged_piece, texts)
+                else:
+                    renderer.draw(True, squares, pieces, dragged_piece, None, texts)
+            times[name] = (time.perf_counter() - start) / frames
+        print(scene.ljust(6), "full redraw", str(round(times["full redraw"] * 1000, 3)).rjust(7), "ms/frame",
+              "| renderer", str(round(times["renderer"] * 1000, 3)).rjust(7), "ms/frame",
+              "(" + str(round(times["full redraw"] / times["renderer"], 1)) + "x)")
+    pygame.quit()
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmarks for the chess engine.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    eval_parser = subparsers.add_parser("eval", help="leaf evaluations per second")
+    eval_parser.add_argument("--positions", type=int, default=POSITION_COUNT)
+    eval_parser.add_argument("--min-time", type=float, default=1.0, help="seconds to time each evaluator for")
+
+    batch_parser = subparsers.add_parser("batch", help="batched NumPy evaluation against evaluating one position at a time")
+    batch_parser.add_argument("--positions", type=int, default=POSITION_COUNT)
+    batch_parser.add_argument("--min-time", type=float, default=1.0, help="seconds to time each batch size for")
+
+    suite_parser = subparsers.add_parser("suite", help="search nodes per second and best moves over a fixed set of positions")
+    suite_parser.add_argument("--depth", type=int, default=SUITE_DEPTH)
+    suite_parser.add_argument("--output", help="file to write the results to as JSON")
+    suite_parser.add_argument("--baseline", help="JSON results of an earlier run to compare against, exits with 1 on a regression")
+    suite_parser.add_argument("--save-baseline", help="file to write the results to as the new baseline")
+    suite_parser.add_argument("--nps-tolerance", type=float, default=NPS_TOLERANCE, help="fraction the nodes per second can drop by")
+    suite_parser.add_argument("--options", default="", help="ChessBot options to search with, such as \"pvs=False,aspiration_window=None\"")
+
+    tactics_parser = subparsers.add_parser("tactics", help="depth reached and positions solved with and without null move pruning and late move reductions")
+    tactics_parser.add_argument("--depth", type=int, default=TACTIC_DEPTH, help="depth the full-width search is timed at")
+
+    parallel_parser = subparsers.add_parser("parallel", help="speedup of the parallel root search and whether it picks the same moves")
+    parallel_parser.add_argument("--depth", type=int, default=SUITE_DEPTH)
+    parallel_parser.add_argument("--workers", type=int, default=PARALLEL_WORKERS)
+
+    service_parser = subparsers.add_parser("service", help="bot moves the engine service accepts from a burst, exits with 1 if the count is wrong")
+    service_parser.add_argument("--burst", type=int, default=SERVICE_BURST, help="bot moves sent at once")
+    service_parser.add_argument("--workers", type=int, default=SERVICE_WORKERS)
+    service_parser.add_argument("--max-queue", type=int, default=SERVICE_QUEUE)
+    service_parser.add_argument("--depth", type=int, default=SERVICE_DEPTH)
+
+    render_parser = subparsers.add_parser("render", help="GUI frame time with the renderer against redrawing the whole window, headless")
+    render_parser.add_argument("--frames", type=int, default=RENDER_FRAMES, help="frames to time for each scene")
+
+    args = parser.parse_args()
+    if args.benchmark == "eval":
+        benchmark_eval(args.positions, args.min_time)
+    elif args.benchmark == "batch":
+        benchmark_batch(args.positions, args.min_time)
+    elif args.benchmark == "render":
+        benchmark_render(args.frames)
+    elif args.benchmark == "tactics":
+        benchmark_tactics(args.depth)
+    elif args.benchmark == "parallel":
+        benchmark_parallel(args.depth, args.workers)
+    elif args.benchmark == "service":
+        sys.exit(benchmark_service(args.burst, args.workers, args.max_queue, args.depth))
+    elif args.benchmark == "suite":
+        sys.exit(benchmark_suite(args.depth, args.output, args.baseline, args.save_baseline, args.nps_tolerance, parse_config(args.options)))
+
+if __name__ == "__main__":
+    main()
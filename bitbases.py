@@ -0,0 +1,216 @@
+import os
+import sys
+import mmap
+import time
+from collections import deque
+import chess #to help with chess rules
+
+#win/draw bitbases for king and pawn, rook or queen against a lone king
+#they are built on the local machine by retrograde analysis with python bitbases.py, then probed by the search through mmap
+
+#directory the bitbase files are written to and read from
+BITBASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bitbases")
+#file of each bitbase, keyed by the piece type that goes with the stronger side's king
+BITBASE_FILES = {chess.PAWN: "KPK.bin", chess.ROOK: "KRK.bin", chess.QUEEN: "KQK.bin"}
+
+#every position is stored with the stronger side as white, positions with a black piece are mirrored before probing
+#index = ((side to move * 64 + strong king) * 64 + weak king) * 64 + piece square, side to move 0 is the stronger side
+POSITIONS = 2 * 64 * 64 * 64
+#one bit per position, set if the stronger side wins, clear for draws and impossible positions
+FILE_SIZE = POSITIONS // 8
+
+STRONG_TO_MOVE = 0
+WEAK_TO_MOVE = 1
+
+def position_index(side_to_move, strong_king, weak_king, piece):
+    return ((side_to_move * 64 + strong_king) * 64 + weak_king) * 64 + piece
+
+#squares attacked by the stronger side's piece (not its king), with the given occupied squares blocking sliders
+def piece_attacks(piece_type, square, occupied):
+    if piece_type == chess.PAWN:
+        return chess.BB_PAWN_ATTACKS[chess.WHITE][square]
+    attacks = 0
+    if piece_type == chess.ROOK or piece_type == chess.QUEEN:
+        attacks |= chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied]
+        attacks |= chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied]
+    if piece_type == chess.QUEEN:
+        attacks |= chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+    return attacks
+
+#checks the three pieces are on different squares, the kings are apart and a pawn is not on the first or last rank
+def is_valid(piece_type, strong_king, weak_king, piece):
+    if strong_king == weak_king or piece == strong_king or piece == weak_king:
+        return False
+    if chess.square_distance(strong_king, weak_king) <= 1:
+        return False
+    if piece_type == chess.PAWN and (chess.square_rank(piece) == 0 or chess.square_rank(piece) == 7):
+        return False
+    return True
+
+def weak_king_attacked(piece_type, strong_king, weak_king, piece):
+    occupied = chess.BB_SQUARES[strong_king] | chess.BB_SQUARES[weak_king] | chess.BB_SQUARES[piece]
+    return bool(piece_attacks(piece_type, piece, occupied) & chess.BB_SQUARES[weak_king])
+
+#the weak king's legal moves as the positions they lead to, None stands for capturing the piece, which is always a draw
+def weak_king_moves(piece_type, strong_king, weak_king, piece):
+    #the weak king does not block the piece's attacks along the line it is moving on
+    attacked = piece_attacks(piece_type, piece, chess.BB_SQUARES[strong_king] | chess.BB_SQUARES[piece])
+    for to in chess.scan_forward(chess.BB_KING_ATTACKS[weak_king]):
+        if chess.square_distance(to, strong_king) <= 1:
+            continue
+        if to == piece:
+            yield None
+        elif not attacked & chess.BB_SQUARES[to]:
+            yield position_index(STRONG_TO_MOVE, strong_king, to, piece)
+
+#squares the stronger side's piece could have come from to reach its square, excluding pawn double steps
+def piece_origins(piece_type, strong_king, weak_king, piece):
+    occupied = chess.BB_SQUARES[strong_king] | chess.BB_SQUARES[weak_king]
+    if piece_type == chess.PAWN:
+        origins = []
+        rank = chess.square_rank(piece)
+        if rank >= 2 and not occupied & chess.BB_SQUARES[piece - 8]:
+            origins.append(piece - 8)
+            #a double step from the second rank
+            if rank == 3 and not occupied & chess.BB_SQUARES[piece - 16]:
+                origins.append(piece - 16)
+        return origins
+    #rooks and queens move the same way backwards as forwards
+    return list(chess.scan_forward(piece_attacks(piece_type, piece, occupied) & ~occupied))
+
+#works out which positions the stronger side wins by retrograde analysis
+#promotion_tables maps a promotion piece type to its finished bitbase, needed for KPK
+#returns a bytearray with 1 for each won position
+def generate(piece_type, promotion_tables=None):
+    won = bytearray(POSITIONS)
+    #legal moves of each weak-to-move position that do not lead to a known win yet
+    moves_left = bytearray(POSITIONS)
+    queue = deque()
+
+    for strong_king in chess.SQUARES:
+        for weak_king in chess.SQUARES:
+            for piece in chess.SQUARES:
+                if not is_valid(piece_type, strong_king, weak_king, piece):
+                    continue
+                index = position_index(WEAK_TO_MOVE, strong_king, weak_king, piece)
+                count = sum(1 for move in weak_king_moves(piece_type, strong_king, weak_king, piece))
+                moves_left[index] = count
+                #checkmate
+                if count == 0 and weak_king_attacked(piece_type, strong_king, weak_king, piece):
+                    won[index] = 1
+                    queue.append(index)
+
+                #pawn moves onto the last rank lead into the rook and queen bitbases
+                if piece_type == chess.PAWN and chess.square_rank(piece) == 6 and not weak_king_attacked(piece_type, strong_king, weak_king, piece):
+                    to = piece + 8
+                    if to != strong_king and to != weak_king:
+                        after = position_index(WEAK_TO_MOVE, strong_king, weak_king, to)
+                        if any(table[after] for table in promotion_tables.values()):
+                            index = position_index(STRONG_TO_MOVE, strong_king, weak_king, piece)
+                            won[index] = 1
+                            queue.append(index)
+
+    while queue:
+        index = queue.popleft()
+        side_to_move, rest = divmod(index, 64 * 64 * 64)
+        strong_king, rest = divmod(rest, 64 * 64)
+        weak_king, piece = divmod(rest, 64)
+
+        if side_to_move == WEAK_TO_MOVE:
+            #the stronger side wins every position it could have moved into this one from
+            predecessors = []
+            for origin in chess.scan_forward(chess.BB_KING_ATTACKS[strong_king]):
+                if origin != piece and origin != weak_king and chess.square_distance(origin, weak_king) > 1:
+                    predecessors.append((origin, piece))
+            for origin in piece_origins(piece_type, strong_king, weak_king, piece):
+                predecessors.append((strong_king, origin))
+            for king, origin in predecessors:
+                #the weak king cannot have been in check with the stronger side to move
+                if weak_king_attacked(piece_type, king, weak_king, origin):
+                    continue
+                before = position_index(STRONG_TO_MOVE, king, weak_king, origin)
+                if not won[before]:
+                    won[before] = 1
+                    queue.append(before)
+        else:
+            #the weak side loses a position once every one of its moves leads to a win
+            for origin in chess.scan_forward(chess.BB_KING_ATTACKS[weak_king]):
+                if origin == piece or origin == strong_king or chess.square_distance(origin, strong_king) <= 1:
+                    continue
+                before = position_index(WEAK_TO_MOVE, strong_king, origin, piece)
+                if won[before] or moves_left[before] == 0:
+                    continue
+                moves_left[before] -= 1
+                if moves_left[before] == 0:
+                    won[before] = 1
+                    queue.append(before)
+
+    return won
+
+#packs one byte per position into one bit per position, position i is bit i % 8 of byte i // 8
+def pack(won):
+    packed = bytearray(FILE_SIZE)
+    for index in range(POSITIONS):
+        if won[index]:
+            packed[index >> 3] |= 1 << (index & 7)
+    return packed
+
+#generates every bitbase and writes it to the directory, the rook and queen bitbases go first since KPK needs them
+def generate_all(directory=BITBASE_DIR):
+    os.makedirs(directory, exist_ok=True)
+    tables = {}
+    for piece_type in (chess.ROOK, chess.QUEEN, chess.PAWN):
+        start = time.time()
+        promotion_tables = tables if piece_type == chess.PAWN else None
+        tables[piece_type] = generate(piece_type, promotion_tables)
+        path = os.path.join(directory, BITBASE_FILES[piece_type])
+        with open(path, "wb") as f:
+            f.write(pack(tables[piece_type]))
+        print(BITBASE_FILES[piece_type], sum(tables[piece_type]), "won positions", str(round(time.time() - start, 1)) + "s")
+
+#reads the bitbase files through mmap, so only the pages that are probed are loaded
+class Bitbases:
+    def __init__(self, directory=BITBASE_DIR):
+        self.tables = {}
+        self.files = []
+        for piece_type, name in BITBASE_FILES.items():
+            path = os.path.join(directory, name)
+            if not os.path.isfile(path) or os.path.getsize(path) != FILE_SIZE:
+                continue
+            f = open(path, "rb")
+            self.files.append(f)
+            self.tables[piece_type] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    #returns 1 if the side to move wins, 0 for a draw and -1 if it loses
+    #None if the position is not covered by a bitbase
+    def probe(self, board):
+        if chess.popcount(board.occupied) != 3:
+            return None
+        piece = chess.lsb(board.occupied & ~board.kings)
+        piece_type = board.piece_type_at(piece)
+        table = self.tables.get(piece_type)
+        if table is None:
+            return None
+
+        colour = board.color_at(piece)
+        strong_king = board.king(colour)
+        weak_king = board.king(not colour)
+        if not colour:
+            strong_king, weak_king, piece = chess.square_mirror(strong_king), chess.square_mirror(weak_king), chess.square_mirror(piece)
+        side_to_move = STRONG_TO_MOVE if board.turn == colour else WEAK_TO_MOVE
+
+        index = position_index(side_to_move, strong_king, weak_king, piece)
+        if not table[index >> 3] >> (index & 7) & 1:
+            return 0
+        return 1 if side_to_move == STRONG_TO_MOVE else -1
+
+    def close(self):
+        for table in self.tables.values():
+            table.close()
+        for f in self.files:
+            f.close()
+        self.tables = {}
+        self.files = []
+
+if __name__ == "__main__":
+    generate_all(sys.argv[1] if len(sys.argv) > 1 else BITBASE_DIR)
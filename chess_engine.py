@@ -0,0 +1,1624 @@
+import chess #to help with chess rules
+import chess.polyglot #zobrist hashing for the transposition table and the opening book
+import os
+import json
+import random
+import time
+import threading
+import queue
+import multiprocessing
+import concurrent.futures
+from multiprocessing import shared_memory
+from bitbases import Bitbases, BITBASE_DIR
+try:
+    import numpy #optional, only needed for batched leaf evaluation
+except ImportError:
+    numpy = None
+
+#the chess engine behind the bot, kept free of pygame so it can be used without a display
+#by the GUI in Chess Bot.py and by the UCI front end in uci.py
+
+#variables to help with minimax
+INF = 999999
+
+#search budget for each bot move, the deepest completed iteration is played
+BOT_MAX_DEPTH = 5
+#seconds, None for no time limit
+BOT_TIME_LIMIT = 2.0
+#positions, None for no node limit
+BOT_NODE_LIMIT = None
+#how many positions are searched between checks of the time and node limits
+CHECK_INTERVAL = 256
+#worker processes used to split the root moves, 1 searches in this process only
+BOT_WORKERS = 1
+#searches the position after the player's expected reply while the player is thinking
+BOT_PONDER = True
+#both sides having this much material or less (kings included) counts as an end game
+END_GAME_MATERIAL = 11500
+
+#move ordering parameters
+#piece values by python-chess piece type, same as the val of the piece classes
+PIECE_VAL = {chess.PAWN: 100, chess.KNIGHT: 300, chess.BISHOP: 300, chess.ROOK: 500, chess.QUEEN: 900, chess.KING: 10000}
+#move order: hash move, captures (most valuable victim, least valuable attacker), promotions, killer moves,
+#captures that lose material by static exchange evaluation (least lost first), then quiet moves by history
+HASH_MOVE_SCORE = 1000000000
+CAPTURE_SCORE = 100000000
+PROMOTION_SCORE = 90000000
+KILLER_SCORE = 80000000
+LOSING_CAPTURE_SCORE = 70000000
+#deepest ply that killer moves are kept for
+MAX_PLY = 64
+
+#principal variation search parameters
+#searches every move after the first with a null window, only searching it again with the full window if it turns out better
+PVS = True
+#width of the window around the previous iteration's score that each iteration starts with, None to always use the full window
+ASPIRATION_WINDOW = 100
+#iterations shallower than this use the full window, their scores move around too much between depths
+ASPIRATION_MIN_DEPTH = 3
+
+#selective search parameters
+#both are off until they are tuned: given the time the full-width search takes to depth 4 on benchmarks.py tactics,
+#they only reach depth 4.2 on average and miss a mate the full-width search finds (WAC.001)
+#null move pruning, skips the rest of a position if passing the move is already good enough for the side to move
+NULL_MOVE = False
+#how much shallower the search after the passed move is, on top of the one ply the pass takes
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+#late move reductions, searches quiet moves that are ordered late one ply shallower unless they turn out to be good
+LMR = False
+LMR_REDUCTION = 1
+LMR_MIN_DEPTH = 3
+#moves searched at full depth before reductions start
+LMR_MIN_MOVES = 3
+#moves this far down the order are reduced by LMR_LATE_REDUCTION instead
+LMR_LATE_MOVES = 6
+LMR_LATE_REDUCTION = 2
+
+#quiescence search parameters
+#a capture is skipped if even winning the piece plus this margin cannot raise the score to alpha
+DELTA_MARGIN = 200
+#captures that lose material by static exchange evaluation are skipped too
+SEE_PRUNING = True
+#also search every reply when in check at the leaves, not just captures and promotions
+QUIESCENCE_EVASIONS = False
+
+#evaluation parameters
+#adds mobility and king safety, worked out from attack bitboards, to the material and PST score at the leaves
+BITBOARD_EVAL = True
+#points for each square a piece attacks that is not its own piece or attacked by an enemy pawn
+MOBILITY_WEIGHT = {chess.KNIGHT: 4, chess.BISHOP: 5, chess.ROOK: 2, chess.QUEEN: 1}
+#points lost for each square next to the king that the opponent attacks
+KING_ZONE_ATTACK = 8
+#points for each of the side's pawns on the three squares in front of its king
+PAWN_SHIELD = 10
+#scores the material and PST of all children of a frontier node in one NumPy batch, needs numpy
+BATCH_EVAL = False
+#positions the batch buffer starts with room for, it grows if a node has more moves
+BATCH_CAPACITY = 256
+
+#opening book parameters
+#Polyglot opening book the bot plays from before it starts searching, no book is used if the file does not exist
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+#endgame bitbase parameters
+#score of a position the bitbases say is won, below a mate found by the search but above any evaluation
+BITBASE_WIN = 50000
+#how many rank and file steps each square is from the middle four squares, 0 in the middle and 6 in the corners
+CENTRE_DISTANCE = [abs(2 * chess.square_file(square) - 7) // 2 + abs(2 * chess.square_rank(square) - 7) // 2 for square in chess.SQUARES]
+#points for each step the losing king is from the centre and for each step the winning king is closer to it
+BITBASE_EDGE_WEIGHT = 10
+BITBASE_KING_WEIGHT = 4
+
+#search statistics parameters
+#collects a SearchStats for every search, the counting is skipped entirely when off
+SEARCH_STATS = False
+#file each search's statistics are appended to as one line of JSON, None to only keep them on the bot
+STATS_LOG = None
+
+#transposition table parameters
+#number of two-entry buckets, each bucket holds a depth-preferred and an always-replace entry
+TT_SIZE = 2 ** 18
+#bound types stored with each entry
+TT_EXACT = 0
+TT_LOWER = 1
+TT_UPPER = 2
+#a bot's keys are XORed with these, so bots of either colour and at either stage of the game can share a table
+#without finding each other's scores, which are from the other side's point of view or from the other evaluation
+TT_BLACK_KEY = 0x5851F42D4C957F2D
+TT_END_GAME_KEY = 0x14057B7EF767814F
+#shared table, see SharedTranspositionTable
+#use a table in shared memory that the bot's worker processes attach to, instead of one in each process
+#None uses one only when the bot searches with more than one worker, so the workers find each other's entries
+SHARED_TT = None
+#64-bit words at the start of the shared table: the generation and the number of buckets
+SHARED_TT_HEADER = 2
+#entries store scores plus this offset in 24 bits
+SHARED_TT_SCORE_OFFSET = 2 ** 23
+#buckets read to estimate how full the shared table is
+SHARED_TT_USAGE_SAMPLES = 4096
+
+#piece-square tables (shortened to PST) to help with bot move generation
+#assigns points to each square on chess board relative to piece
+#points > 0 are good positions for bot to move piece into, regardless of capture
+
+KING_PST_WHITE = [[5, 30, 5, 0, 0, 10, 30, 5],
+            [20, 20, 0, 0, 0, 0, 20, 20],
+            [-10, -20, -20, -20, -20, -20, -20, -10],
+            [-20, -30, -30, -40, -40, -30, -30, -20],
+            [-30, -40, -40, -50, -50, -40, -40, -30],
+            [-30, -40, -40, -50, -50, -40, -40, -30],
+            [-30, -40, -40, -50, -50, -40, -40, -30],
+            [-30, -40, -40, -50, -50, -40, -40, -30]]
+
+KING_PST_BLACK = [[5, 30, 10, 0, 0, 5, 30, 5],
+                  [20, 20, 0, 0, 0, 0, 20, 20],
+                  [-10, -20, -20, -20, -20, -20, -20, -10],
+                  [-20, -30, -30, -40, -40, -30, -30, -20],
+                  [-30, -40, -40, -50, -50, -40, -40, -30],
+                  [-30, -40, -40, -50, -50, -40, -40, -30],
+                  [-30, -40, -40, -50, -50, -40, -40, -30],
+                  [-30, -40, -40, -50, -50, -40, -40, -30]]
+
+QUEEN_PST = [[-20, -10, -10, -5, -5, -10, -10, -20],
+             [-10, 0, 5, 0, 0, 0, 0, -10],
+             [-10, 5, 5, 5, 5, 5, 0, -10],
+             [0, 0, 5, 5, 5, 5, 0, -5],
+             [-5, 0, 5, 5, 5, 5, 0, -5],
+             [-10, 0, 5, 5, 5, 5, 0, -10],
+             [-10, 0, 0, 0, 0, 0, 0, -10], 
+             [-20, -10, -10, -5,-5, -10, -10, -20]]
+
+ROOK_PST = [[0, 0, 0, 5, 5, 0, 0, 0],
+            [-5, 0, 0, 0, 0, 0, 0, -5],
+            [-5, 0, 0, 0, 0, 0, 0, -5],
+            [-5, 0, 0, 0, 0, 0, 0, -5],
+            [-5, 0, 0, 0, 0, 0, 0, -5],
+            [-5, 0, 0, 0, 0, 0, 0, -5],
+            [5, 10, 10, 10, 10, 10, 10, 5],
+            [0, 0, 0, 0, 0, 0, 0, 0]]
+
+BISHOP_PST = [[-20, -10, -10, -10, -10, -10, -10, -20],
+              [-10, 5, 0, 0, 0, 0, 5, -10],
+              [-10, 10, 10, 10, 10, 10, 10, -10],
+              [-10, 0, 10, 10, 10, 10, 0, -10],
+              [-10, 5, 5, 10, 10, 5, 5, -10],
+              [-10, 0, 5, 10, 10, 5, 0, -10],
+              [-10, 0, 0, 0, 0, 0, 0, -10],
+              [-20, -10, -10, -10, -10, -10, -10, -20]]
+
+KNIGHT_PST = [[-50, -40, -30, -30, -30, -30, -40, -50],
+              [-40, -20, 0, 5, 5, 0, -20, -40],
+              [-30, 5, 10, 15, 15, 10, 5, -30],
+              [-30, 0, 15, 20, 20, 15, 0, -30],
+              [-30, 5, 15, 20, 20, 15, 5, -30],
+              [-30, 0, 10, 15, 15, 10, 0, -30],
+              [-40, -20, 0, 0, 0, 0, -20, -40],
+              [-50, -40, -30, -30, -30, -30, -40, -50]]
+
+PAWN_PST = [[0, 0, 0, 0, 0, 0, 0, 0], 
+            [5, 10, 10, -20, -20, 10, 10, 5],
+            [5, -5, -10, 0, 0, -10, -5, 5],
+            [0, 0, 0, 20, 20, 0, 0, 0],
+            [5, 5, 10, 20, 20, 10, 5, 5],
+            [10, 10, 10, 15, 15, 10, 10, 10],
+            [50, 50, 50, 50, 50, 50, 50, 50],
+            [0, 0, 0, 0, 0, 0, 0, 0]]
+
+#material value of each piece code, see SearchBoard for the codes
+#black codes are negative, so they index the list from the end
+CODE_VAL = [0] * 13
+for piece_type in chess.PIECE_TYPES:
+    CODE_VAL[piece_type] = PIECE_VAL[piece_type]
+    CODE_VAL[-piece_type] = PIECE_VAL[piece_type]
+
+#turns the PST tables into one list of 64 values per piece code, indexed by python-chess square (a1 = 0, h8 = 63)
+#each table is written from the side of the piece's owner, with their back rank in the first row
+def build_pst_squares(end_game):
+    tables = {chess.PAWN: PAWN_PST, chess.KNIGHT: KNIGHT_PST, chess.BISHOP: BISHOP_PST, chess.ROOK: ROOK_PST, chess.QUEEN: QUEEN_PST}
+    pst_squares = [[0] * 64 for i in range(13)]
+    for piece_type in chess.PIECE_TYPES:
+        for colour in chess.COLORS:
+            if piece_type == chess.KING:
+                #king PST does not apply to end games
+                table = None if end_game else (KING_PST_WHITE if colour else KING_PST_BLACK)
+            else:
+                table = tables[piece_type]
+            code = piece_type if colour else -piece_type
+            for square in chess.SQUARES:
+                rank, file = chess.square_rank(square), chess.square_file(square)
+                if table is None:
+                    pst_squares[code][square] = 0
+                elif colour:
+                    pst_squares[code][square] = table[rank][7 - file]
+                else:
+                    pst_squares[code][square] = table[7 - rank][file]
+    return pst_squares
+
+PST_SQUARES = build_pst_squares(False)
+PST_SQUARES_END_GAME = build_pst_squares(True)
+
+#static exchange evaluation, the material a series of captures on one square wins if each side always captures
+#with its least valuable piece and stops once capturing no longer pays, worked out from the attack bitboards alone
+#pins and checks are ignored, so it is an estimate, but one that costs a few table lookups instead of a search
+
+#pieces of either colour attacking the square, with only the pieces in occupied counted as on the board
+#sliders are looked up again for each occupied, so a piece behind one that has captured joins in
+def attackers_to(board, square, occupied):
+    rooks_queens = board.rooks | board.queens
+    bishops_queens = board.bishops | board.queens
+    attackers = ((chess.BB_KNIGHT_ATTACKS[square] & board.knights) | (chess.BB_KING_ATTACKS[square] & board.kings) |
+                 (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied] & rooks_queens) |
+                 (chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied] & rooks_queens) |
+                 (chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied] & bishops_queens) |
+                 (chess.BB_PAWN_ATTACKS[chess.BLACK][square] & board.pawns & board.occupied_co[chess.WHITE]) |
+                 (chess.BB_PAWN_ATTACKS[chess.WHITE][square] & board.pawns & board.occupied_co[chess.BLACK]))
+    return attackers & occupied
+
+#material side wins by starting an exchange on the square, where the piece standing on it is worth value
+#0 if side is better off not capturing at all
+def exchange_gain(board, square, side, occupied, value):
+    attackers = attackers_to(board, square, occupied)
+    #value of the piece each capture takes
+    gains = []
+    while True:
+        own = attackers & board.occupied_co[side]
+        if not own:
+            break
+        for piece_type in chess.PIECE_TYPES:
+            capturer = own & board.pieces_mask(piece_type, side)
+            if capturer:
+                break
+        gains.append(value)
+        value = PIECE_VAL[piece_type]
+        occupied ^= capturer & -capturer
+        attackers = attackers_to(board, square, occupied)
+        side = not side
+
+    #each side only takes if what it captures is worth more than what it then loses
+    gain = 0
+    for captured in reversed(gains):
+        gain = max(0, captured - gain)
+    return gain
+
+#material the side to move wins with the capture (or promotion), negative if the exchange it starts loses material
+def see(board, move):
+    occupied = board.occupied ^ chess.BB_SQUARES[move.from_square]
+    if board.is_en_passant(move):
+        captured = PIECE_VAL[chess.PAWN]
+        occupied ^= chess.BB_SQUARES[move.to_square - 8 if board.turn else move.to_square + 8]
+    else:
+        victim = board.piece_type_at(move.to_square)
+        captured = PIECE_VAL[victim] if victim else 0
+    if move.promotion:
+        captured += PIECE_VAL[move.promotion] - PIECE_VAL[chess.PAWN]
+        moved = move.promotion
+    else:
+        moved = board.piece_type_at(move.from_square)
+    return captured - exchange_gain(board, move.to_square, not board.turn, occupied, PIECE_VAL[moved])
+
+#the board used inside the search, a flat list of 64 piece codes with running material and PST totals for each side
+#white pieces are coded as their python-chess piece type, black pieces as the negative of it and empty squares as 0
+#moves are made and undone in place, so the search never builds pieces or goes through a FEN string
+class SearchBoard:
+    def __init__(self, board, end_game=False):
+        self.squares = [0] * 64
+        #indexed by colour, chess.BLACK is 0 and chess.WHITE is 1
+        self.material = [0, 0]
+        self.pst = [0, 0]
+        self.pst_squares = PST_SQUARES_END_GAME if end_game else PST_SQUARES
+        for square, piece in board.piece_map().items():
+            code = piece.piece_type if piece.color else -piece.piece_type
+            self.squares[square] = code
+            self.material[piece.color] += CODE_VAL[code]
+            self.pst[piece.color] += self.pst_squares[code][square]
+
+    #checks if end game with rough estimate of pieces left
+    def is_end_game(self):
+        return self.material[chess.WHITE] <= END_GAME_MATERIAL and self.material[chess.BLACK] <= END_GAME_MATERIAL
+
+    #makes a legal move, returns the captured piece code and its square which are needed to undo it
+    def make(self, move):
+        squares = self.squares
+        pst_squares = self.pst_squares
+        from_sq, to_sq = move.from_square, move.to_square
+        code = squares[from_sq]
+        colour = code > 0
+
+        captured = squares[to_sq]
+        captured_sq = to_sq
+        #en passant is a pawn moving diagonally onto an empty square, the captured pawn is beside it
+        if captured == 0 and (code == chess.PAWN or code == -chess.PAWN) and (to_sq - from_sq) % 8 != 0:
+            captured_sq = to_sq - 8 if colour else to_sq + 8
+            captured = squares[captured_sq]
+            squares[captured_sq] = 0
+        if captured != 0:
+            self.material[not colour] -= CODE_VAL[captured]
+            self.pst[not colour] -= pst_squares[captured][captured_sq]
+
+        new_code = code
+        if move.promotion:
+            new_code = move.promotion if colour else -move.promotion
+            self.material[colour] += CODE_VAL[new_code] - CODE_VAL[code]
+        squares[from_sq] = 0
+        squares[to_sq] = new_code
+        self.pst[colour] += pst_squares[new_code][to_sq] - pst_squares[code][from_sq]
+
+        #castling is the king moving two squares, the rook jumps over it
+        if (code == chess.KING or code == -chess.KING) and abs(to_sq - from_sq) == 2:
+            if to_sq > from_sq:
+                self.move_rook(from_sq + 3, from_sq + 1, colour)
+            else:
+                self.move_rook(from_sq - 4, from_sq - 1, colour)
+
+        return captured, captured_sq
+
+    #undoes a move made with make, undo is what make returned
+    def unmake(self, move, undo):
+        captured, captured_sq = undo
+        squares = self.squares
+        pst_squares = self.pst_squares
+        from_sq, to_sq = move.from_square, move.to_square
+        new_code = squares[to_sq]
+        colour = new_code > 0
+
+        code = new_code
+        if move.promotion:
+            code = chess.PAWN if colour else -chess.PAWN
+            self.material[colour] -= CODE_VAL[new_code] - CODE_VAL[code]
+        squares[to_sq] = 0
+        squares[from_sq] = code
+        self.pst[colour] -= pst_squares[new_code][to_sq] - pst_squares[code][from_sq]
+
+        if captured != 0:
+            squares[captured_sq] = captured
+            self.material[not colour] += CODE_VAL[captured]
+            self.pst[not colour] += pst_squares[captured][captured_sq]
+
+        if (code == chess.KING or code == -chess.KING) and abs(to_sq - from_sq) == 2:
+            if to_sq > from_sq:
+                self.move_rook(from_sq + 1, from_sq + 3, colour)
+            else:
+                self.move_rook(from_sq - 1, from_sq - 4, colour)
+
+    def move_rook(self, rook_from, rook_to, colour):
+        rook = self.squares[rook_from]
+        self.squares[rook_from] = 0
+        self.squares[rook_to] = rook
+        self.pst[colour] += self.pst_squares[rook][rook_to] - self.pst_squares[rook][rook_from]
+
+#scores many positions at once with NumPy, summing the material and PST weight of every square in a single vectorized gather
+#positions are added as the 64 piece codes of a search board, which is the 12x64 piece planes in compact form
+class BatchEvaluator:
+    def __init__(self, colour, end_game, capacity=BATCH_CAPACITY):
+        pst_squares = PST_SQUARES_END_GAME if end_game else PST_SQUARES
+        #row code + 6 holds the value of that piece code on each square, from the side of the bot
+        self.weights = numpy.zeros((13, 64), dtype=numpy.int64)
+        for code in range(-6, 7):
+            if code != 0:
+                sign = 1 if (code > 0) == colour else -1
+                self.weights[code + 6] = [sign * (CODE_VAL[code] + pst_squares[code][square]) for square in chess.SQUARES]
+        self.square_index = numpy.arange(64)
+        self.buffer = numpy.zeros((capacity, 64), dtype=numpy.int8)
+        self.count = 0
+
+    def add(self, squares):
+        if self.count == len(self.buffer):
+            self.buffer = numpy.concatenate((self.buffer, numpy.zeros_like(self.buffer)))
+        self.buffer[self.count] = squares
+        self.count += 1
+
+    #scores every position added since the last call, the same as evaluate_pieces + evaluate_position
+    def evaluate(self):
+        codes = self.buffer[:self.count]
+        self.count = 0
+        return self.weights[codes + 6, self.square_index].sum(axis=1).tolist()
+
+#caches search results keyed by the zobrist hash of a position
+#entries are tuples of (key, depth, score, bound type, best move)
+class TranspositionTable:
+    #only visible to the process it was made in
+    shared = False
+    name = None
+
+    def __init__(self, size=TT_SIZE):
+        self.size = size
+        self.table = [None] * (size * 2)
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key):
+        self.probes += 1
+        index = (key % self.size) * 2
+        entry = self.table[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        entry = self.table[index + 1]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        index = (key % self.size) * 2
+        entry = self.table[index]
+        #the first slot keeps the deepest search seen for the bucket, everything else goes in the second slot
+        if entry is None or entry[0] == key or depth >= entry[1]:
+            self.table[index] = (key, depth, score, flag, move)
+        else:
+            self.table[index + 1] = (key, depth, score, flag, move)
+
+    def clear(self):
+        self.table = [None] * (self.size * 2)
+        self.probes = 0
+        self.hits = 0
+
+    #entries are not aged, the deepest search of a bucket stays until a deeper one replaces it
+    def new_search(self):
+        pass
+
+#transposition table in shared memory that several processes search with at once, see ChessBot's shared_tt
+#the process that makes it owns it, others attach to it by name and can then probe and store the same entries
+#each entry is two 64-bit words, the packed entry and the key XORed with it, so an entry that another process
+#is halfway through writing does not match its key and is treated as missing, without any locking
+class SharedTranspositionTable:
+    shared = True
+
+    #makes a table with size two-entry buckets, or attaches to the table with the given name
+    def __init__(self, size=TT_SIZE, name=None):
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=(SHARED_TT_HEADER + size * 4) * 8)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.owner = name is None
+        self.name = self.memory.name
+        self.table = self.memory.buf.cast("Q")
+        if self.owner:
+            self.table[1] = size
+        self.size = self.table[1]
+        #counted by each process for its own probes
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key):
+        self.probes += 1
+        table = self.table
+        index = SHARED_TT_HEADER + (key % self.size) * 4
+        data = table[index + 1]
+        if not data or table[index] ^ data != key:
+            index += 2
+            data = table[index + 1]
+            if not data or table[index] ^ data != key:
+                return None
+        self.hits += 1
+        #move (16 bits, 0 for none), flag (2), depth (8), generation (8), score (24)
+        move = data & 0xFFFF
+        if move:
+            move -= 1
+            move = chess.Move(move & 63, (move >> 6) & 63, (move >> 12) or None)
+        else:
+            move = None
+        return (key, (data >> 18) & 255, ((data >> 34) & 0xFFFFFF) - SHARED_TT_SCORE_OFFSET, (data >> 16) & 3, move)
+
+    def store(self, key, depth, score, flag, move):
+        table = self.table
+        generation = table[0]
+        index = SHARED_TT_HEADER + (key % self.size) * 4
+        data = table[index + 1]
+        #like TranspositionTable the first slot keeps the deepest search, but only from the current generation
+        if data and table[index] ^ data != key and depth < (data >> 18) & 255 and (data >> 26) & 255 == generation:
+            index += 2
+        move_code = 1 + move.from_square + (move.to_square << 6) + ((move.promotion or 0) << 12) if move is not None else 0
+        data = move_code | (flag << 16) | (min(max(depth, 0), 255) << 18) | (generation << 26) | ((score + SHARED_TT_SCORE_OFFSET) << 34)
+        table[index + 1] = data
+        table[index] = key ^ data
+
+    #empties the table for every process using it
+    def clear(self):
+        for i in range(SHARED_TT_HEADER, len(self.table)):
+            self.table[i] = 0
+        self.probes = 0
+        self.hits = 0
+
+    #starts a new generation, entries from older ones are replaced first
+    def new_search(self):
+        self.table[0] = (self.table[0] + 1) % 256
+
+    #fraction of the entries that are filled, from buckets sampled evenly across the whole table
+    #entries of every generation count, each search starts a new one so with many searches at once the
+    #current generation alone holds almost nothing
+    def usage(self):
+        table = self.table
+        buckets = min(self.size, SHARED_TT_USAGE_SAMPLES)
+        step = self.size / buckets
+        used = 0
+        for i in range(buckets):
+            index = SHARED_TT_HEADER + int(i * step) * 4
+            if table[index + 1]:
+                used += 1
+            if table[index + 3]:
+                used += 1
+        return used / (buckets * 2)
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0
+
+    #detaches from the table, which is removed once the process that made it closes it
+    def close(self):
+        if getattr(self, "table", None) is None:
+            return
+        self.table.release()
+        self.table = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+    #worker processes exit without closing their bots, the view has to be released before the memory can be closed
+    def __del__(self):
+        self.close()
+
+#counts kept for one search when statistics are turned on, to show where the time of each move goes
+class SearchStats:
+    def __init__(self):
+        #positions visited by minimax at each distance from the root, not counting the quiescence search
+        self.ply_nodes = [0] * (MAX_PLY + 1)
+        #positions whose moves were searched, and positions handed to the quiescence search
+        self.interior_nodes = 0
+        self.leaf_nodes = 0
+        #interior positions that stopped early on a cutoff, and how many of those stopped on the first move searched
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        #positions answered by the transposition table without searching them
+        self.tt_cutoffs = 0
+        #positions cut off by null move pruning, moves searched with a late move reduction and how many of those were searched again
+        self.null_move_cutoffs = 0
+        self.reductions = 0
+        self.reduction_re_searches = 0
+        #captures the quiescence search skipped because they lose material
+        self.see_prunes = 0
+        #one entry for each completed iteration with its depth, the positions it searched (quiescence included) and its seconds
+        self.iterations = []
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.bitbase_hits = 0
+        self.book_move = False
+        self.nodes = 0
+        self.time = 0
+
+    def cutoff_rate(self):
+        return self.cutoffs / self.interior_nodes if self.interior_nodes else 0
+
+    def first_move_cutoff_rate(self):
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0
+
+    #how many times more positions each iteration searched than the one before it
+    def branching_factors(self):
+        return [after["nodes"] / before["nodes"] for before, after in zip(self.iterations, self.iterations[1:]) if before["nodes"]]
+
+    def effective_branching_factor(self):
+        factors = self.branching_factors()
+        return factors[-1] if factors else 0
+
+    def tt_hit_rate(self):
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0
+
+    def to_dict(self):
+        last_ply = max([ply for ply, nodes in enumerate(self.ply_nodes) if nodes] or [0])
+        return {"nodes": self.nodes, "time": self.time, "nps": self.nodes / self.time if self.time > 0 else 0,
+                "iterations": self.iterations, "ply_nodes": self.ply_nodes[:last_ply + 1],
+                "interior_nodes": self.interior_nodes, "leaf_nodes": self.leaf_nodes,
+                "cutoffs": self.cutoffs, "cutoff_rate": self.cutoff_rate(),
+                "first_move_cutoffs": self.first_move_cutoffs, "first_move_cutoff_rate": self.first_move_cutoff_rate(),
+                "branching_factors": self.branching_factors(), "effective_branching_factor": self.effective_branching_factor(),
+                "tt_probes": self.tt_probes, "tt_hits": self.tt_hits, "tt_hit_rate": self.tt_hit_rate(), "tt_cutoffs": self.tt_cutoffs,
+                "null_move_cutoffs": self.null_move_cutoffs, "reductions": self.reductions, "reduction_re_searches": self.reduction_re_searches, "see_prunes": self.see_prunes,
+                "bitbase_hits": self.bitbase_hits, "book_move": self.book_move}
+
+#raised inside minimax once the search runs out of time or positions
+class SearchTimeout(Exception):
+    pass
+
+#runs the bot's search in a background thread so the caller keeps handling its own events
+#the search works on copies of the board, finished searches are handed back through a queue
+class SearchWorker:
+    #notify is called from the search thread whenever a result is ready, so the caller can wait instead of polling
+    def __init__(self, notify=None):
+        self.notify = notify
+        self.results = queue.Queue()
+        self.thread = None
+        self.stop_event = None
+        #increases with every search so results of cancelled searches can be ignored
+        self.search_id = 0
+        #the player's move the running search expects, None unless pondering
+        self.ponder_move = None
+        #FEN after the expected move, the player's move is a hit if it leads to the same position
+        self.ponder_fen = None
+        #set once the expected move is played, see ChessBot.search
+        self.ponderhit_event = None
+
+    def start(self, bot, board, max_depth=BOT_MAX_DEPTH, time_limit=None, node_limit=None):
+        self.cancel()
+        self.search_id += 1
+        self.stop_event = threading.Event()
+
+        self.thread = threading.Thread(target=self.run, args=(self.search_id, self.stop_event, bot, board.copy(), max_depth, time_limit, node_limit, None), daemon=True)
+        self.thread.start()
+
+    #starts searching the position after the player's most likely reply, the second move of the bot's principal variation
+    #call it straight after playing the bot's move, the limits only start to apply once the reply is played
+    #returns False if there is no reply to predict
+    def ponder(self, bot, board, max_depth=BOT_MAX_DEPTH, time_limit=None, node_limit=None):
+        self.cancel()
+        if len(bot.pv) < 2 or not board.move_stack or board.peek() != bot.pv[0] or not board.is_legal(bot.pv[1]):
+            return False
+        self.search_id += 1
+        self.stop_event = threading.Event()
+        self.ponderhit_event = threading.Event()
+        self.ponder_move = bot.pv[1]
+        ponder_board = board.copy()
+        ponder_board.push(self.ponder_move)
+        self.ponder_fen = ponder_board.fen()
+
+        self.thread = threading.Thread(target=self.run, args=(self.search_id, self.stop_event, bot, ponder_board, max_depth, time_limit, node_limit, self.ponderhit_event), daemon=True)
+        self.thread.start()
+        return True
+
+    #call once the player has moved, returns True if they played the expected move
+    #the ponder search then becomes the bot's search, it is either finished already or carries on with its limits timed from now
+    #on a miss the ponder search is stopped, what it stored in the transposition table stays for the next search
+    def ponderhit(self, board):
+        if self.ponder_move is None:
+            return False
+        if board.fen() != self.ponder_fen:
+            self.cancel()
+            return False
+        self.ponder_move = None
+        self.ponderhit_event.set()
+        return True
+
+    def run(self, search_id, stop_event, bot, board, max_depth, time_limit, node_limit, ponderhit):
+        score, move = bot.search(board, max_depth, time_limit, node_limit, stop_event, ponderhit)
+        if not stop_event.is_set():
+            self.results.put((search_id, score, move, bot.positions))
+            if self.notify is not None:
+                self.notify()
+
+    #returns (score, move, positions) once the current search has finished, None otherwise
+    #a ponder search's result is held back until the player has played the expected move
+    def poll(self):
+        if self.ponder_move is not None:
+            return None
+        while True:
+            try:
+                search_id, score, move, positions = self.results.get_nowait()
+            except queue.Empty:
+                return None
+            if search_id == self.search_id:
+                return score, move, positions
+
+    #stops the running search and waits for it, its result is thrown away
+    def cancel(self):
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+        self.search_id += 1
+        self.ponder_move = None
+        self.ponder_fen = None
+        self.ponderhit_event = None
+
+class ChessBot:
+    def __init__(self, colour, tt_size=TT_SIZE, quiescence_evasions=QUIESCENCE_EVASIONS, workers=BOT_WORKERS, bitboard_eval=BITBOARD_EVAL, batch_eval=BATCH_EVAL, book_path=BOOK_PATH, bitbase_dir=BITBASE_DIR, collect_stats=SEARCH_STATS, stats_log=STATS_LOG, pvs=PVS, aspiration_window=ASPIRATION_WINDOW, null_move=NULL_MOVE, lmr=LMR, see_pruning=SEE_PRUNING, shared_tt=SHARED_TT):
+        self.col = colour 
+        self.workers = workers
+        #started the first time a parallel search is made
+        self.pool = None
+        self.manager = None
+        self.shared_alpha = None
+        self.shared_nodes = None
+        self.alpha_lock = None
+        self.positions = 0
+        #positions searched by the quiescence search, counted separately from positions
+        self.q_positions = 0
+        self.quiescence_evasions = quiescence_evasions
+        self.pvs = pvs
+        self.aspiration_window = aspiration_window
+        self.null_move = null_move
+        self.lmr = lmr
+        self.see_pruning = see_pruning
+        self.bitboard_eval = bitboard_eval
+        if batch_eval and numpy is None:
+            raise ImportError("batched evaluation needs numpy")
+        self.batch_eval = batch_eval
+        #made for the bot's colour and the current stage of the game when a search starts
+        self.batch = None
+        self.batch_end_game = False
+        #the book is memory-mapped when first needed, so looking a position up only reads the entries it needs
+        self.book_path = book_path
+        self.book = None
+        #picks between book moves in proportion to their weights
+        self.book_random = random.Random()
+        #True if the last move came from the book instead of a search
+        self.book_move = False
+        #endgames with three pieces are looked up instead of searched, None if no bitbases have been generated
+        self.bitbase_dir = bitbase_dir
+        self.bitbases = Bitbases(bitbase_dir) if bitbase_dir is not None else None
+        if self.bitbases is not None and not self.bitbases.tables:
+            self.bitbases = None
+        #positions scored by the bitbases during the current search
+        self.bitbase_hits = 0
+        #whether positions covered by a bitbase end the search straight away, see search
+        self.bitbase_cutoff = False
+        #king PST does not apply to end games, worked out from the material at the start of each search
+        self.end_game = False
+        #kept for the whole game so consecutive moves and undos can reuse earlier searches
+        #shared_tt is False for a table of the bot's own, True to make a shared one or the name of one to attach to
+        if shared_tt is None:
+            shared_tt = workers > 1
+        if shared_tt is True:
+            self.tt = SharedTranspositionTable(tt_size)
+        elif shared_tt:
+            self.tt = SharedTranspositionTable(name=shared_tt)
+        else:
+            self.tt = TranspositionTable(tt_size)
+        #principal variation of the last completed iteration, used to order the next one
+        self.pv = []
+        #two quiet moves per ply that caused a cutoff
+        self.killers = [[None, None] for i in range(MAX_PLY)]
+        #how often each quiet (from square, to square) move caused a cutoff, weighted by depth
+        self.history = [0] * 4096
+        self.depth_reached = 0
+        #search limits, only checked once the first iteration has finished
+        self.deadline = None
+        self.node_limit = None
+        self.limits_active = False
+        #in a worker of a parallel search, (count, lock) of the positions every worker and the bot itself have searched,
+        #which is what node_limit is checked against, and how many of this worker's positions are in the count so far
+        self.node_count = None
+        self.counted_nodes = 0
+        #set by another thread once a ponder search should start counting its limits, see search
+        self.ponderhit = None
+        self.ponder_limits = None
+        self.next_check = 0
+        #set from another thread to cancel the search
+        self.stop_event = None
+        #statistics of the last search, None unless collect_stats is on
+        self.collect_stats = collect_stats or stats_log is not None
+        self.stats_log = stats_log
+        self.stats = None
+
+    #iterative deepening driver, searches depth 1, 2, ... until max_depth or until the time/node budget runs out
+    #returns the score and move of the deepest completed iteration
+    #with a ponderhit event the search is pondering: it has no time or node limit until the event is set,
+    #then the limits are counted from that moment
+    def search(self, board, max_depth=BOT_MAX_DEPTH, time_limit=None, node_limit=None, stop_event=None, ponderhit=None):
+        self.positions = 0
+        self.q_positions = 0
+        self.bitbase_hits = 0
+        self.pv = []
+        self.depth_reached = 0
+        self.stats = SearchStats() if self.collect_stats else None
+        start = time.perf_counter()
+
+        #positions in the book are answered straight away without searching
+        move = self.probe_book(board)
+        self.book_move = move is not None
+        if move is not None:
+            self.pv = [move]
+            if self.stats is not None:
+                self.stats.book_move = True
+                self.finish_stats(board, 0, move, start)
+            return 0, move
+
+        self.ponderhit = ponderhit
+        if ponderhit is None:
+            self.set_limits(time_limit, node_limit)
+        else:
+            self.deadline = None
+            self.node_limit = None
+            self.ponder_limits = (time_limit, node_limit)
+        self.stop_event = stop_event
+        self.limits_active = False
+        self.next_check = CHECK_INTERVAL
+
+        #killers only make sense relative to this root, history is aged so older searches count for less
+        self.killers = [[None, None] for i in range(MAX_PLY)]
+        self.history = [h // 2 for h in self.history]
+
+        sb = SearchBoard(board, self.end_game)
+        if not self.end_game and sb.is_end_game():
+            self.end_game = True
+            #king PST no longer applies, so scores cached during the middlegame are stale
+            #a shared table is used by other bots too, the end game key keeps its stale entries from being found
+            if not self.tt.shared:
+                self.tt.clear()
+            sb = SearchBoard(board, True)
+        if self.batch_eval and (self.batch is None or self.batch_end_game != self.end_game):
+            self.batch = BatchEvaluator(self.col, self.end_game)
+            self.batch_end_game = self.end_game
+
+        #a line that goes into a bitbase endgame ends there, but if the game is already in one the search carries on
+        #so that it can find the mate, scoring the bitbase positions at its leaves
+        self.bitbase_cutoff = chess.popcount(board.occupied) > 3
+
+        #a search can be stopped in the middle of a line, so saves what is needed to undo it
+        stack_len = len(board.move_stack)
+        self.tt.new_search()
+        tt_probes, tt_hits = self.tt.probes, self.tt.hits
+
+        best_score, best_move = -INF, None
+        for depth in range(1, max_depth + 1):
+            iteration_start = time.perf_counter()
+            iteration_nodes = self.positions + self.q_positions
+            try:
+                if self.workers > 1:
+                    score, move = self.parallel_root(board, depth)
+                elif self.aspiration_window is not None and depth >= ASPIRATION_MIN_DEPTH and abs(best_score) < BITBASE_WIN:
+                    score, move = self.aspiration_search(board, depth, best_score, sb)
+                else:
+                    score, move = self.minimax(board, depth, -INF, INF, True, sb)
+            except SearchTimeout:
+                while len(board.move_stack) > stack_len:
+                    board.pop()
+                #the search board is only used for this search, so it does not need to be undone
+                break
+
+            if move is not None:
+                best_score, best_move = score, move
+            self.depth_reached = depth
+            self.pv = self.get_pv(board, depth)
+            if self.stats is not None:
+                self.stats.iterations.append({"depth": depth, "nodes": self.positions + self.q_positions - iteration_nodes,
+                                              "time": time.perf_counter() - iteration_start})
+            #the first iteration always finishes so there is a move to play
+            self.limits_active = True
+
+            if self.stop_event is not None and self.stop_event.is_set():
+                break
+
+            #a forced mate will not change with more depth
+            if abs(score) >= INF:
+                break
+
+        self.limits_active = False
+        self.stop_event = None
+        self.ponderhit = None
+        if self.stats is not None:
+            self.stats.tt_probes = self.tt.probes - tt_probes
+            self.stats.tt_hits = self.tt.hits - tt_hits
+            self.finish_stats(board, best_score, best_move, start)
+        return best_score, best_move
+
+    #fills in the totals of the search's statistics and appends them to the log if there is one
+    def finish_stats(self, board, score, move, start):
+        self.stats.time = time.perf_counter() - start
+        self.stats.nodes = self.positions + self.q_positions
+        self.stats.bitbase_hits = self.bitbase_hits
+        if self.stats_log is not None:
+            record = {"fen": board.fen(), "move": move.uci() if move is not None else None, "score": score, "depth": self.depth_reached}
+            record.update(self.stats.to_dict())
+            with open(self.stats_log, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    #searches the root with a small window around the score of the previous iteration, which cuts off more of the tree
+    #if the score lands outside the window it is only a bound, so the window is widened on that side and the root searched again
+    def aspiration_search(self, board, depth, previous_score, sb):
+        low_width = high_width = self.aspiration_window
+        while True:
+            alpha = max(previous_score - low_width, -INF)
+            beta = min(previous_score + high_width, INF)
+            score, move = self.minimax(board, depth, alpha, beta, True, sb)
+            if score <= alpha and alpha > -INF:
+                low_width *= 4
+            elif score >= beta and beta < INF:
+                high_width *= 4
+            else:
+                return score, move
+
+    #returns a move picked from the opening book, None if the position is not in the book or there is no book
+    def probe_book(self, board):
+        if self.book is None:
+            if self.book_path is None or not os.path.isfile(self.book_path):
+                return None
+            self.book = chess.polyglot.open_reader(self.book_path)
+        try:
+            return self.book.weighted_choice(board, random=self.book_random).move
+        except IndexError:
+            return None
+
+    #the pool, its worker bots and the shared alpha are kept for the whole game, so each search starts with warm workers
+    def start_pool(self):
+        if self.pool is None:
+            #forking a process with threads can leave it stuck on a lock another thread held (uci.py reading stdin),
+            #so the workers are started fresh, as they always are on Windows
+            context = multiprocessing.get_context("spawn")
+            self.manager = context.Manager()
+            self.pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            self.shared_alpha = self.manager.Value("i", -INF)
+            self.shared_nodes = self.manager.Value("i", 0)
+            self.alpha_lock = self.manager.Lock()
+
+    #shuts down the worker processes of the parallel search and closes the opening book and bitbases
+    def close(self):
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+        if self.bitbases is not None:
+            self.bitbases.close()
+            self.bitbases = None
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.manager.shutdown()
+            self.pool = None
+            self.manager = None
+            self.shared_alpha = None
+            self.shared_nodes = None
+            self.alpha_lock = None
+        if self.tt.shared:
+            self.tt.close()
+
+    #key of the position in the transposition table, see TT_BLACK_KEY
+    def tt_key(self, board):
+        key = chess.polyglot.zobrist_hash(board)
+        if not self.col:
+            key ^= TT_BLACK_KEY
+        if self.end_game:
+            key ^= TT_END_GAME_KEY
+        return key
+
+    #the bot's search settings as ChessBot arguments, so another bot (a worker's, a benchmark's) searches the same way
+    def settings(self):
+        return {"tt_size": self.tt.size, "quiescence_evasions": self.quiescence_evasions, "bitboard_eval": self.bitboard_eval,
+                "batch_eval": self.batch_eval, "book_path": self.book_path, "bitbase_dir": self.bitbase_dir, "pvs": self.pvs,
+                "aspiration_window": self.aspiration_window, "null_move": self.null_move, "lmr": self.lmr, "see_pruning": self.see_pruning}
+
+    #searches the first root move here, then the rest in worker processes, which share the best score found so far
+    #gives the same move as minimax at the same depth: a move that can still be the best is given its exact score,
+    #and the first move in search order with the best score is picked, as minimax does
+    #this needs a move's score not to depend on the window it is searched with, which null move pruning breaks
+    def parallel_root(self, board, depth):
+        self.start_pool()
+        key = self.tt_key(board)
+        entry = self.tt.probe(key)
+        hash_move = entry[4] if entry is not None else None
+        if hash_move is None and self.pv:
+            hash_move = self.pv[0]
+        moves = self.order_moves(board, [move for move in board.legal_moves], 0, hash_move)
+        if not moves:
+            return (-INF if board.is_checkmate() else 0), None
+
+        #the first move is usually the best, so searching it on its own gives the workers a good alpha from the start
+        #like the serial search it gets the full window
+        self.positions += 1
+        best_score = self.search_move(board, moves[0], depth, -INF, INF, True, SearchBoard(board, self.end_game), 0)
+        best_move = moves[0]
+        self.shared_alpha.value = best_score
+        self.shared_nodes.value = self.positions + self.q_positions
+
+        #like the serial search, limits only apply after the first iteration
+        limits = (self.deadline, self.node_limit) if self.limits_active else (None, None)
+        #the workers replay the game from its first position, so they detect repetitions like the serial search
+        root_fen = board.root().fen()
+        played = [move.uci() for move in board.move_stack]
+        #with a shared table the workers search with the bot's own table instead of one each
+        tt_name = self.tt.name if self.tt.shared else None
+        #the workers order moves with the killers and history the first move left, like the serial search's second move
+        #rather than with whatever their own earlier searches left
+        ordering = (self.killers, self.history)
+        shared = (self.shared_alpha, self.shared_nodes, self.alpha_lock)
+        futures = [self.pool.submit(search_root_move, root_fen, played, move.uci(), depth, self.col, self.end_game, self.bitbase_cutoff,
+                                    self.settings(), limits, shared, tt_name, ordering) for move in moves[1:]]
+
+        pending = futures
+        while pending:
+            done, pending = concurrent.futures.wait(pending, timeout=0.05)
+            #also starts the limits of a ponder search once its move is played, the workers only know the limits they were given
+            try:
+                self.check_limits()
+            except SearchTimeout:
+                for future in pending:
+                    future.cancel()
+                raise
+
+        #picks the first move in search order with the best exact score, the same one the serial search keeps
+        #a move that only has a bound scored below a move's exact score, so cannot be the best or tie with it
+        timed_out = False
+        for move, future in zip(moves[1:], futures):
+            evaluation, exact, positions, q_positions = future.result()
+            self.positions += positions + 1
+            self.q_positions += q_positions
+            if evaluation is None:
+                timed_out = True
+            elif exact and evaluation > best_score:
+                best_score, best_move = evaluation, move
+        if timed_out:
+            raise SearchTimeout()
+
+        self.tt.store(key, depth, best_score, TT_EXACT, best_move)
+        return best_score, best_move
+
+    #times a serial search against a parallel search at the same depth, to help pick the number of workers for a machine
+    #both bots search with this bot's settings
+    def benchmark_parallel(self, board, depth, workers):
+        bitbase_cutoff = chess.popcount(board.occupied) > 3
+        serial_bot = ChessBot(self.col, workers=1, **self.settings())
+        serial_bot.end_game = self.end_game
+        serial_bot.bitbase_cutoff = bitbase_cutoff
+        start = time.time()
+        serial_score, serial_move = serial_bot.minimax(board, depth, -INF, INF, True, SearchBoard(board, self.end_game))
+        serial_time = time.time() - start
+        serial_bot.close()
+
+        parallel_bot = ChessBot(self.col, workers=workers, **self.settings())
+        parallel_bot.end_game = self.end_game
+        parallel_bot.bitbase_cutoff = bitbase_cutoff
+        #process start up is not part of the search time, and the search starts from the same state as the serial one
+        parallel_bot.parallel_root(board, 1)
+        parallel_bot.tt.clear()
+        parallel_bot.killers = [[None, None] for i in range(MAX_PLY)]
+        parallel_bot.history = [0] * 4096
+        parallel_bot.positions = 0
+        parallel_bot.q_positions = 0
+        start = time.time()
+        parallel_score, parallel_move = parallel_bot.parallel_root(board, depth)
+        parallel_time = time.time() - start
+        parallel_bot.close()
+
+        return {"depth": depth, "workers": workers,
+                "serial_time": serial_time, "parallel_time": parallel_time,
+                "speedup": serial_time / parallel_time if parallel_time > 0 else 0,
+                "serial_move": str(serial_move), "parallel_move": str(parallel_move),
+                "serial_score": serial_score, "parallel_score": parallel_score,
+                "serial_positions": serial_bot.positions, "parallel_positions": parallel_bot.positions,
+                "same_move": serial_move == parallel_move}
+
+    #follows the best moves stored in the transposition table from the current position
+    def get_pv(self, board, depth):
+        pv = []
+        for i in range(depth):
+            entry = self.tt.probe(self.tt_key(board))
+            if entry is None or entry[4] is None or not board.is_legal(entry[4]):
+                break
+            pv.append(entry[4])
+            board.push(entry[4])
+        for i in range(len(pv)):
+            board.pop()
+        return pv
+
+    #time_limit in seconds from now, node_limit in positions from the ones already searched
+    def set_limits(self, time_limit, node_limit):
+        self.deadline = time.time() + time_limit if time_limit is not None else None
+        self.node_limit = self.positions + self.q_positions + node_limit if node_limit is not None else None
+
+    def check_limits(self):
+        nodes = self.positions + self.q_positions
+        self.next_check = nodes + CHECK_INTERVAL
+        #a stopped search still has to answer with a move (UCI sends it as bestmove), so like the limits
+        #the stop only counts once the first iteration has finished
+        if self.limits_active and self.stop_event is not None and self.stop_event.is_set():
+            raise SearchTimeout()
+        if self.ponderhit is not None:
+            if not self.ponderhit.is_set():
+                return
+            #the expected move was played, from now on this is a normal search
+            self.ponderhit = None
+            self.set_limits(*self.ponder_limits)
+        if not self.limits_active:
+            return
+        if self.deadline is not None and time.time() >= self.deadline:
+            raise SearchTimeout()
+        if self.node_limit is not None:
+            if self.node_count is not None:
+                #the limit is for the whole parallel search, so this worker's positions are added to the shared count
+                count, lock = self.node_count
+                with lock:
+                    count.value += nodes - self.counted_nodes
+                    nodes = count.value
+                self.counted_nodes = self.positions + self.q_positions
+            if nodes >= self.node_limit:
+                raise SearchTimeout()
+
+    #main function which determins which move the bot will play next
+    #static_eval is the material and PST score of the position if it was already worked out in a batch
+    def minimax(self, board, depth, alpha, beta, bot_turn, sb, ply=0, static_eval=None):
+        if self.positions + self.q_positions >= self.next_check:
+            self.check_limits()
+        stats = self.stats
+        if stats is not None:
+            stats.ply_nodes[ply if ply < MAX_PLY else MAX_PLY] += 1
+
+        #positions covered by a bitbase are scored exactly without searching them, the root still has to pick a move
+        if self.bitbases is not None and self.bitbase_cutoff and ply > 0 and chess.popcount(board.occupied) == 3:
+            score = self.probe_bitbases(board, sb, bot_turn)
+            if score is not None:
+                return score, None
+        #once the game is in a bitbase endgame every winning line scores about the same
+        #so going back to an earlier position is scored as the draw it is heading towards, to keep the win moving forward
+        if self.bitbases is not None and not self.bitbase_cutoff and ply > 0 and board.is_repetition(2):
+            return 0, None
+
+        if depth <= 0:
+            self.positions += 1
+            if stats is not None:
+                stats.leaf_nodes += 1
+            #keeps searching captures so the evaluation is not taken in the middle of an exchange
+            return self.quiesce(board, alpha, beta, bot_turn, sb, ply, static_eval), None
+
+        #checks if this position has already been searched deep enough
+        key = self.tt_key(board)
+        alpha_orig, beta_orig = alpha, beta
+        entry = self.tt.probe(key)
+        #the root always has to search so that it returns a move
+        #a bound only cuts the search off, it does not narrow the window, so the result below is flagged against
+        #the window it was really searched with
+        if entry is not None and entry[1] >= depth and ply > 0:
+            tt_score, tt_flag = entry[2], entry[3]
+            if tt_flag == TT_EXACT or tt_flag == TT_LOWER and tt_score >= beta or tt_flag == TT_UPPER and tt_score <= alpha:
+                if stats is not None:
+                    stats.tt_cutoffs += 1
+                return tt_score, entry[4]
+
+        #null move pruning, lets the side to move pass and searches the reply with less depth
+        #if passing already gets the score outside the window, a real move is assumed to as well
+        #not used in check, twice in a row, or when the side to move only has pawns, since having to move can then be what loses
+        in_check = None
+        if self.null_move and ply > 0 and depth >= NULL_MOVE_MIN_DEPTH and board.peek() and (beta < INF if bot_turn else alpha > -INF):
+            in_check = board.is_check()
+            if not in_check and board.occupied_co[board.turn] & ~(board.pawns | board.kings):
+                board.push(chess.Move.null())
+                if bot_turn:
+                    evaluation, m = self.minimax(board, depth - 1 - NULL_MOVE_REDUCTION, beta - 1, beta, False, sb, ply + 1)
+                else:
+                    evaluation, m = self.minimax(board, depth - 1 - NULL_MOVE_REDUCTION, alpha, alpha + 1, True, sb, ply + 1)
+                board.pop()
+                if bot_turn and evaluation >= beta or not bot_turn and evaluation <= alpha:
+                    if stats is not None:
+                        stats.null_move_cutoffs += 1
+                    return (beta if bot_turn else alpha), None
+
+        moves = [move for move in board.legal_moves]
+        #if there are no legal moves
+        if not moves:
+            if board.is_checkmate():
+                if bot_turn:
+                    return -INF, None
+                else:
+                    return INF, None
+            #else stalemate
+            return 0, None
+
+        if stats is not None:
+            stats.interior_nodes += 1
+
+        #searches the stored best move first, falling back to the previous iteration's principal variation
+        hash_move = entry[4] if entry is not None else None
+        if hash_move is None and ply < len(self.pv):
+            hash_move = self.pv[ply]
+        moves = self.order_moves(board, moves, ply, hash_move)
+
+        #the children of a frontier node are all leaves, so their evaluations are worked out together
+        static_evals = [None] * len(moves)
+        if self.batch is not None and depth == 1:
+            static_evals = self.batch_children(moves, sb)
+
+        if self.lmr and in_check is None and depth >= LMR_MIN_DEPTH:
+            in_check = board.is_check()
+
+        #best_move = random.choice(moves)
+        best_move = None
+
+        if bot_turn:
+            #bot is the maximizing player in minimax
+            max_eval = -INF
+            for i, move in enumerate(moves):
+
+                self.positions += 1
+
+                reduction = self.reduction(board, move, i, depth, ply, in_check) if self.lmr else 0
+                if i == 0 or not self.pvs and not reduction:
+                    evaluation = self.search_move(board, move, depth, alpha, beta, True, sb, ply, static_evals[i])
+                else:
+                    #principal variation search, checks with a null window that the move is no better than the best so far
+                    evaluation = self.search_move(board, move, depth - reduction, alpha, alpha + 1, True, sb, ply, static_evals[i])
+                    if reduction and evaluation > alpha:
+                        #the reduced search says the move is better, so it gets the full depth
+                        if stats is not None:
+                            stats.reduction_re_searches += 1
+                        evaluation = self.search_move(board, move, depth, alpha, alpha + 1, True, sb, ply, static_evals[i])
+                    if alpha < evaluation < beta:
+                        #it is better, so is searched again to get its score
+                        evaluation = self.search_move(board, move, depth, alpha, beta, True, sb, ply, static_evals[i])
+
+                #if depth == 4:
+                    #print(move, evaluation, "depth 4")
+
+                alpha = max(alpha, evaluation)
+
+                if evaluation > max_eval:
+                    max_eval = evaluation
+                    best_move = move
+
+                #player had a better move elsewhere, can skip evaluating
+                if beta <= alpha:
+                    self.update_cutoff(board, move, depth, ply)
+                    if stats is not None:
+                        stats.cutoffs += 1
+                        stats.first_move_cutoffs += i == 0
+                    break
+
+            if max_eval <= alpha_orig:
+                flag = TT_UPPER
+            elif max_eval >= beta_orig:
+                flag = TT_LOWER
+            else:
+                flag = TT_EXACT
+            self.tt.store(key, depth, max_eval, flag, best_move)
+
+            return max_eval, best_move
+
+        else:
+            #player is the minimizing player in minimax
+            min_eval = INF
+            for i, move in enumerate(moves):
+
+                self.positions += 1
+
+                reduction = self.reduction(board, move, i, depth, ply, in_check) if self.lmr else 0
+                if i == 0 or not self.pvs and not reduction:
+                    evaluation = self.search_move(board, move, depth, alpha, beta, False, sb, ply, static_evals[i])
+                else:
+                    evaluation = self.search_move(board, move, depth - reduction, beta - 1, beta, False, sb, ply, static_evals[i])
+                    if reduction and evaluation < beta:
+                        if stats is not None:
+                            stats.reduction_re_searches += 1
+                        evaluation = self.search_move(board, move, depth, beta - 1, beta, False, sb, ply, static_evals[i])
+                    if alpha < evaluation < beta:
+                        evaluation = self.search_move(board, move, depth, alpha, beta, False, sb, ply, static_evals[i])
+
+                if evaluation < min_eval:
+                    min_eval = evaluation
+                    best_move = move
+
+                beta = min(beta, evaluation)
+                #bot had a better move elsewhere, can skip evaluating
+                if beta <= alpha:
+                    self.update_cutoff(board, move, depth, ply)
+                    if stats is not None:
+                        stats.cutoffs += 1
+                        stats.first_move_cutoffs += i == 0
+                    break
+
+            if min_eval >= beta_orig:
+                flag = TT_LOWER
+            elif min_eval <= alpha_orig:
+                flag = TT_UPPER
+            else:
+                flag = TT_EXACT
+            self.tt.store(key, depth, min_eval, flag, best_move)
+                
+            return min_eval, best_move
+
+    #how many plies less a move is searched with by late move reductions
+    #only quiet moves that come late in the move order are reduced, and never in check or when the move gives check
+    #root moves are not reduced either, so the parallel search, which searches each root move at full depth, picks the same move
+    def reduction(self, board, move, i, depth, ply, in_check):
+        if i < LMR_MIN_MOVES or depth < LMR_MIN_DEPTH or in_check or ply == 0:
+            return 0
+        if move.promotion or board.is_capture(move) or (ply < MAX_PLY and move in self.killers[ply]) or board.gives_check(move):
+            return 0
+        if self.stats is not None:
+            self.stats.reductions += 1
+        return LMR_LATE_REDUCTION if i >= LMR_LATE_MOVES else LMR_REDUCTION
+
+    #makes the move, searches the position after it and undoes it
+    def search_move(self, board, move, depth, alpha, beta, bot_turn, sb, ply, static_eval=None):
+        undo = sb.make(move)
+        board.push(move)
+        #a piece left where it can be taken is not penalised here, the search (down to the quiescence search,
+        #which plays out the exchange) already scores the player taking it, so a penalty would count it twice
+        evaluation, m = self.minimax(board, depth - 1, alpha, beta, not bot_turn, sb, ply + 1, static_eval)
+        board.pop()
+        sb.unmake(move, undo)
+        return evaluation
+
+    #material and PST scores of the positions after each move, worked out in one batch
+    def batch_children(self, moves, sb):
+        for move in moves:
+            undo = sb.make(move)
+            self.batch.add(sb.squares)
+            sb.unmake(move, undo)
+        return self.batch.evaluate()
+
+    #searches only captures and promotions (and check evasions if enabled) until the position is quiet
+    def quiesce(self, board, alpha, beta, bot_turn, sb, ply, static_eval=None):
+        if self.positions + self.q_positions >= self.next_check:
+            self.check_limits()
+        self.q_positions += 1
+
+        if self.bitbases is not None and chess.popcount(board.occupied) == 3:
+            score = self.probe_bitbases(board, sb, bot_turn)
+            if score is not None:
+                return score
+
+        in_check = self.quiescence_evasions and board.is_check()
+        if in_check:
+            #every reply has to be searched when in check, so there is no stand pat
+            moves = [move for move in board.legal_moves]
+            if not moves:
+                return -INF if bot_turn else INF
+            stand_pat = -INF if bot_turn else INF
+        else:
+            #the side to move can usually do at least as well as the current evaluation by not capturing
+            if static_eval is None:
+                stand_pat = self.evaluate_board(board, sb)
+            else:
+                stand_pat = static_eval + (self.evaluate_activity(board) if self.bitboard_eval else 0)
+            if ply >= MAX_PLY:
+                return stand_pat
+            if bot_turn:
+                if stand_pat >= beta:
+                    return stand_pat
+                alpha = max(alpha, stand_pat)
+            else:
+                if stand_pat <= alpha:
+                    return stand_pat
+                beta = min(beta, stand_pat)
+
+            moves = [move for move in board.generate_legal_captures()]
+            #promotions that do not capture
+            promotion_rank = chess.BB_RANK_7 if board.turn else chess.BB_RANK_2
+            moves += [move for move in board.generate_legal_moves(board.pawns & promotion_rank, ~board.occupied)]
+
+        moves = self.order_moves(board, moves, ply, None)
+        best = stand_pat
+        for move in moves:
+            #material gained by the move
+            value = 0
+            if board.is_capture(move):
+                value = PIECE_VAL[chess.PAWN] if board.is_en_passant(move) else PIECE_VAL[board.piece_type_at(move.to_square)]
+            promotion_value = PIECE_VAL[move.promotion] - PIECE_VAL[chess.PAWN] if move.promotion else 0
+
+            #delta pruning, skips captures that cannot change the outcome
+            if not in_check:
+                if bot_turn and stand_pat + value + promotion_value + DELTA_MARGIN < alpha:
+                    continue
+                if not bot_turn and stand_pat - value - promotion_value - DELTA_MARGIN > beta:
+                    continue
+                #skips captures that lose material, taking a piece worth at least the capturer never does
+                if self.see_pruning and value and PIECE_VAL[board.piece_type_at(move.from_square)] > value and see(board, move) < 0:
+                    if self.stats is not None:
+                        self.stats.see_prunes += 1
+                    continue
+
+            undo = sb.make(move)
+            board.push(move)
+            evaluation = self.quiesce(board, alpha, beta, not bot_turn, sb, ply + 1)
+            board.pop()
+            sb.unmake(move, undo)
+
+            if bot_turn:
+                best = max(best, evaluation)
+                alpha = max(alpha, evaluation)
+            else:
+                best = min(best, evaluation)
+                beta = min(beta, evaluation)
+            if beta <= alpha:
+                break
+
+        return best
+
+    #exact score of a position from the bitbases, None if it is not covered
+    #won positions also score how far the win has got, so the bot pushes its pawn and drives the losing king to the edge
+    def probe_bitbases(self, board, sb, bot_turn):
+        result = self.bitbases.probe(board)
+        if result is None:
+            return None
+        self.bitbase_hits += 1
+        if result == 0:
+            return 0
+        if result < 0 and board.is_checkmate():
+            return -INF if bot_turn else INF
+
+        winner = board.turn if result > 0 else not board.turn
+        winning_king, losing_king = board.king(winner), board.king(not winner)
+        progress = sb.material[winner] + sb.pst[winner] - sb.material[not winner] - sb.pst[not winner]
+        progress += BITBASE_EDGE_WEIGHT * CENTRE_DISTANCE[losing_king] + BITBASE_KING_WEIGHT * (14 - chess.square_manhattan_distance(winning_king, losing_king))
+        score = BITBASE_WIN + progress
+        return score if winner == self.col else -score
+
+    #sorts moves so that the ones most likely to cause a cutoff are searched first
+    def order_moves(self, board, moves, ply, hash_move):
+        killers = self.killers[ply] if ply < MAX_PLY else (None, None)
+        scores = []
+        for move in moves:
+            if move == hash_move:
+                score = HASH_MOVE_SCORE
+            elif board.is_capture(move):
+                #en passant is the only capture where the victim is not on the to square
+                victim = chess.PAWN if board.is_en_passant(move) else board.piece_type_at(move.to_square)
+                attacker = board.piece_type_at(move.from_square)
+                score = CAPTURE_SCORE + PIECE_VAL[victim] * 1000 - PIECE_VAL[attacker]
+                #taking a piece worth at least the capturer never loses material, otherwise the exchange decides
+                if PIECE_VAL[attacker] > PIECE_VAL[victim]:
+                    gain = see(board, move)
+                    if gain < 0:
+                        score = LOSING_CAPTURE_SCORE + gain
+            elif move.promotion:
+                score = PROMOTION_SCORE + PIECE_VAL[move.promotion]
+            elif move == killers[0]:
+                score = KILLER_SCORE + 1
+            elif move == killers[1]:
+                score = KILLER_SCORE
+            else:
+                score = self.history[move.from_square * 64 + move.to_square]
+            scores.append(score)
+
+        #sort is stable, so moves with equal scores keep their generated order
+        return [move for score, move in sorted(zip(scores, moves), key=lambda pair: pair[0], reverse=True)]
+
+    #records a quiet move that caused a cutoff in the killer and history tables
+    def update_cutoff(self, board, move, depth, ply):
+        if board.is_capture(move) or move.promotion:
+            return
+        if ply < MAX_PLY and self.killers[ply][0] != move:
+            self.killers[ply][1] = self.killers[ply][0]
+            self.killers[ply][0] = move
+        self.history[move.from_square * 64 + move.to_square] += depth * depth
+
+    #evaluates entire state of the board from the running totals of the search board
+    #plus the mobility and king safety terms, which depend on the attacks so are worked out from the bitboards
+    def evaluate_board(self, board, sb):
+        score = self.evaluate_pieces(sb) + self.evaluate_position(sb)
+        if self.bitboard_eval:
+            score += self.evaluate_activity(board)
+        return score
+
+    #the same score as evaluate_board, worked out from the bitboards of the board alone without a search board
+    def evaluate_bitboards(self, board):
+        pst_squares = PST_SQUARES_END_GAME if self.end_game else PST_SQUARES
+        scores = [0, 0]
+        for colour in chess.COLORS:
+            score = 0
+            for piece_type in chess.PIECE_TYPES:
+                mask = board.pieces_mask(piece_type, colour)
+                score += chess.popcount(mask) * PIECE_VAL[piece_type]
+                table = pst_squares[piece_type if colour else -piece_type]
+                for square in chess.scan_forward(mask):
+                    score += table[square]
+            scores[colour] = score
+
+        score = scores[self.col] - scores[not self.col]
+        if self.bitboard_eval:
+            score += self.evaluate_activity(board)
+        return score
+
+    #mobility and king safety from the attack bitboards, the bot's score minus the player's
+    def evaluate_activity(self, board):
+        pawns = board.pawns
+        white_pawns = pawns & board.occupied_co[chess.WHITE]
+        black_pawns = pawns & board.occupied_co[chess.BLACK]
+        #indexed by colour like the search board totals
+        pawn_attacks = [chess.shift_down_left(black_pawns) | chess.shift_down_right(black_pawns),
+                        chess.shift_up_left(white_pawns) | chess.shift_up_right(white_pawns)]
+        attacked = pawn_attacks[:]
+        scores = [0, 0]
+
+        occupied = board.occupied
+        diagonal_sliders = board.bishops | board.queens
+        for colour in chess.COLORS:
+            own = board.occupied_co[colour]
+            #squares a piece could go to without landing on its own piece or being taken by a pawn
+            safe = ~own & ~pawn_attacks[not colour]
+            #the attacks of each piece are looked up directly in the python-chess attack tables
+            piece_attacks = 0
+            score = 0
+            for square in chess.scan_forward(board.knights & own):
+                attacks = chess.BB_KNIGHT_ATTACKS[square]
+                piece_attacks |= attacks
+                score += chess.popcount(attacks & safe) * MOBILITY_WEIGHT[chess.KNIGHT]
+            for square in chess.scan_forward(diagonal_sliders & own):
+                attacks = chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+                if board.queens & chess.BB_SQUARES[square]:
+                    attacks |= chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied] | chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied]
+                    weight = MOBILITY_WEIGHT[chess.QUEEN]
+                else:
+                    weight = MOBILITY_WEIGHT[chess.BISHOP]
+                piece_attacks |= attacks
+                score += chess.popcount(attacks & safe) * weight
+            for square in chess.scan_forward(board.rooks & own):
+                attacks = chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied] | chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied]
+                piece_attacks |= attacks
+                score += chess.popcount(attacks & safe) * MOBILITY_WEIGHT[chess.ROOK]
+            attacked[colour] |= piece_attacks
+            scores[colour] = score
+
+        #the king is meant to come out in the end game, so it is only kept safe before then
+        if not self.end_game:
+            for colour in chess.COLORS:
+                king = board.king(colour)
+                if king is None:
+                    continue
+                zone = chess.BB_KING_ATTACKS[king]
+                scores[colour] -= chess.popcount(zone & attacked[not colour]) * KING_ZONE_ATTACK
+                front = chess.square_rank(king) + (1 if colour else -1)
+                if 0 <= front < 8:
+                    shield = zone & chess.BB_RANKS[front] & (white_pawns if colour else black_pawns)
+                    scores[colour] += chess.popcount(shield) * PAWN_SHIELD
+
+        return scores[self.col] - scores[not self.col]
+
+    #finds the material value score for bot and player, returns the difference
+    #if score < 0, player is winning; score > 0, bot is winning; score == 0, even
+    def evaluate_pieces(self, sb):
+        return sb.material[self.col] - sb.material[not self.col]
+
+    #PST score of the bot's pieces minus the PST score of the player's pieces
+    def evaluate_position(self, sb):
+        return sb.pst[self.col] - sb.pst[not self.col]
+
+#bots kept by each worker process of the parallel search, so their transposition tables carry over between root moves
+#keyed by colour, table name and settings, a bot for a colour is replaced when the table or settings change
+root_worker_bots = {}
+
+#searches one root move for the bot in a worker process, returns its score, whether the score is exact rather than
+#a bound, and the positions searched, the score is None if the search ran out of time
+#the game is given as its first position and the moves played since, so repetitions count as in the serial search
+#limits is the (deadline, node_limit) of the parallel search, shared is its (best score, position count, lock)
+#tt_name is the name of the bot's shared transposition table, None if it has its own
+#ordering is the bot's (killers, history) to order moves with
+def search_root_move(root_fen, played, move_uci, depth, colour, end_game, bitbase_cutoff, settings, limits, shared, tt_name=None, ordering=None):
+    #workers do not read the book
+    settings = dict(settings, book_path=None)
+    key = (colour, tt_name) + tuple(sorted(settings.items()))
+    if key not in root_worker_bots:
+        for old_key in [old_key for old_key in root_worker_bots if old_key[0] == colour]:
+            root_worker_bots.pop(old_key).close()
+        root_worker_bots[key] = ChessBot(colour, workers=1, shared_tt=tt_name or False, **settings)
+    bot = root_worker_bots[key]
+    if end_game and not bot.end_game and not bot.tt.shared:
+        bot.tt.clear()
+    bot.end_game = end_game
+    bot.bitbase_cutoff = bitbase_cutoff
+    bot.positions = 0
+    bot.q_positions = 0
+    bot.pv = []
+    if ordering is not None:
+        bot.killers, bot.history = ordering
+    shared_alpha, shared_nodes, lock = shared
+    bot.deadline, bot.node_limit = limits
+    bot.limits_active = bot.deadline is not None or bot.node_limit is not None
+    bot.node_count = (shared_nodes, lock)
+    bot.counted_nodes = 0
+    #checks the limits at the first position, so the moves still queued once they are reached stop straight away
+    bot.next_check = 0
+
+    board = chess.Board(root_fen)
+    for played_move in played:
+        board.push_uci(played_move)
+    sb = SearchBoard(board, end_game)
+
+    #the move only matters if it scores at least the best so far, as it then beats it or ties with it, and a tie
+    #goes to the move searched first, so like minimax a null window tests that and only then the exact score is found
+    #the window starts one below the best so far, so a score equal to it is exact
+    alpha = shared_alpha.value
+    low = max(alpha - 1, -INF)
+    move = chess.Move.from_uci(move_uci)
+    try:
+        if bot.pvs:
+            evaluation = bot.search_move(board, move, depth, low, low + 1, True, sb, 0)
+            if evaluation > low:
+                evaluation = bot.search_move(board, move, depth, low, INF, True, sb, 0)
+        else:
+            evaluation = bot.search_move(board, move, depth, low, INF, True, sb, 0)
+    except SearchTimeout:
+        return None, False, bot.positions, bot.q_positions
+    #a score at the bottom of the window is only a bound, unless nothing can score lower
+    exact = evaluation > low or low == -INF
+
+    with lock:
+        if exact and evaluation > shared_alpha.value:
+            shared_alpha.value = evaluation
+        #the positions searched since the last check of the limits
+        shared_nodes.value += bot.positions + bot.q_positions - bot.counted_nodes
+    return evaluation, exact, bot.positions, bot.q_positions
@@ -0,0 +1,337 @@
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import os
+import time
+import concurrent.futures
+import chess #to help with chess rules
+from chess_engine import ChessBot, SharedTranspositionTable, BOT_MAX_DEPTH, BOT_TIME_LIMIT, TT_SIZE
+
+#serves many games at once over a socket, so one host can play far more games than one GUI process each
+#clients send one JSON object per line and get one JSON object per line back, for example
+#{"id": 1, "op": "new", "bot_colour": "black"}                     -> {"id": 1, "session": "1", "fen": "..."}
+#{"id": 2, "op": "move", "session": "1", "move": "e2e4"}           -> {"id": 2, "fen": "...", "result": "*"}
+#{"id": 3, "op": "bot_move", "session": "1", "time": 1.0}          -> {"id": 3, "move": "e7e5", "score": 0, ...}
+#{"id": 4, "op": "metrics"}                                        -> {"id": 4, "sessions": 1, "queue_depth": 0, ...}
+#the other operations are undo, state and close, a failed request is answered with {"id": ..., "error": "..."}
+#games are only state kept in this process, the searches run in a fixed number of engine worker processes
+#which all search with one transposition table in shared memory, so what one worker stores the others can use
+
+#engine worker processes, each searches one bot move at a time
+SERVICE_WORKERS = os.cpu_count()
+#bot moves that can wait for a worker before new ones are turned away as busy
+MAX_QUEUE = 256
+#seconds a bot move can take from the request to the answer, including the wait for a worker, unless the request says otherwise
+DEFAULT_DEADLINE = 10.0
+#seconds of the deadline kept back for sending the move back to the service
+DEADLINE_MARGIN = 0.05
+#requests from one connection that can be in progress at once, after that the connection is not read until one finishes
+MAX_CLIENT_REQUESTS = 64
+#seconds a game can go without a request before it is dropped, None keeps games until they are closed
+SESSION_TIMEOUT = 3600.0
+#bot move latencies kept for the percentiles in the metrics
+LATENCY_SAMPLES = 1000
+
+#raised for a request that cannot be carried out, its message is sent back to the client
+class ServiceError(Exception):
+    pass
+
+#raised for a bot move turned away because the queue is full, counted as rejected rather than as an error
+class ServiceBusy(ServiceError):
+    pass
+
+#one game, the search itself happens in a worker process given the moves so far
+class GameSession:
+    __slots__ = ("id", "board", "bot_colour", "end_game", "lock", "last_used")
+
+    def __init__(self, session_id, board, bot_colour):
+        self.id = session_id
+        self.board = board
+        self.bot_colour = bot_colour
+        #whether the bot has switched to its end game evaluation in this game, see ChessBot.search
+        self.end_game = False
+        #one request at a time for each game, so a player's move waits for a bot move being searched
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+class EngineService:
+    def __init__(self, workers=SERVICE_WORKERS, max_queue=MAX_QUEUE, session_timeout=SESSION_TIMEOUT, tt_size=TT_SIZE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.session_timeout = session_timeout
+        #made by the service and attached to by the workers, removed when the service closes
+        self.tt = SharedTranspositionTable(tt_size)
+        self.pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        #one slot for each worker, bot moves wait for a slot instead of piling up inside the pool
+        self.slots = asyncio.Semaphore(workers)
+        self.sessions = {}
+        self.session_ids = itertools.count(1)
+        #bot moves waiting for a worker and being searched
+        self.waiting = 0
+        self.running = 0
+        self.counts = collections.Counter()
+        self.latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+        self.queue_waits = collections.deque(maxlen=LATENCY_SAMPLES)
+        #drops unused games, started by serve when there is a session timeout
+        self.expiry_task = None
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        self.tt.close()
+
+    def get_session(self, request):
+        session = self.sessions.get(str(request.get("session")))
+        if session is None:
+            raise ServiceError("unknown session")
+        session.last_used = time.monotonic()
+        return session
+
+    #answers one request, returns the response without its id
+    async def handle(self, request):
+        op = request.get("op")
+        self.counts["requests"] += 1
+        if op == "new":
+            return self.new_game(request)
+        elif op == "move":
+            session = self.get_session(request)
+            async with session.lock:
+                return self.player_move(session, request)
+        elif op == "bot_move":
+            session = self.get_session(request)
+            async with session.lock:
+                return await self.bot_move(session, request)
+        elif op == "undo":
+            session = self.get_session(request)
+            async with session.lock:
+                for i in range(int(request.get("plies", 1))):
+                    if session.board.move_stack:
+                        session.board.pop()
+                return self.state(session)
+        elif op == "state":
+            return self.state(self.get_session(request))
+        elif op == "close":
+            self.sessions.pop(self.get_session(request).id, None)
+            return {"closed": True}
+        elif op == "metrics":
+            return self.metrics()
+        raise ServiceError("unknown op " + str(op))
+
+    def new_game(self, request):
+        try:
+            board = chess.Board(request.get("fen", chess.STARTING_FEN))
+        except ValueError:
+            raise ServiceError("invalid fen")
+        bot_colour = request.get("bot_colour", "black") == "white"
+        session = GameSession(str(next(self.session_ids)), board, bot_colour)
+        self.sessions[session.id] = session
+        response = self.state(session)
+        response["session"] = session.id
+        return response
+
+    def player_move(self, session, request):
+        board = session.board
+        if board.turn == session.bot_colour:
+            raise ServiceError("it is the bot's turn")
+        try:
+            move = board.parse_uci(str(request.get("move")))
+        except ValueError:
+            raise ServiceError("illegal move")
+        board.push(move)
+        return self.state(session)
+
+    #searches the bot's move in a worker process and plays it
+    #the request can give time (seconds), depth and nodes for the search and deadline (seconds from now) for the answer
+    async def bot_move(self, session, request):
+        received = time.monotonic()
+        board = session.board
+        if board.turn != session.bot_colour:
+            raise ServiceError("it is the player's turn")
+        if board.is_game_over():
+            raise ServiceError("the game is over")
+        deadline = received + float(request.get("deadline", DEFAULT_DEADLINE))
+
+        #a free worker is taken at once, only moves that have to wait for one count against the queue
+        if not self.slots.locked():
+            await self.slots.acquire()
+        else:
+            #turns the move away straight away rather than letting the queue grow without limit
+            if self.waiting >= self.max_queue:
+                self.counts["rejected"] += 1
+                raise ServiceBusy("busy")
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self.slots.acquire(), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                self.counts["expired"] += 1
+                raise ServiceError("deadline passed while waiting for a worker")
+            finally:
+                self.waiting -= 1
+
+        started = time.monotonic()
+        self.queue_waits.append(started - received)
+        self.running += 1
+        try:
+            time_limit = max(deadline - started - DEADLINE_MARGIN, 0)
+            #"time": null leaves only the deadline
+            if request.get("time", BOT_TIME_LIMIT) is not None:
+                time_limit = min(float(request.get("time", BOT_TIME_LIMIT)), time_limit)
+            max_depth = int(request.get("depth", BOT_MAX_DEPTH))
+            node_limit = int(request["nodes"]) if request.get("nodes") is not None else None
+            moves = [move.uci() for move in board.move_stack]
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.pool, search_session, board.root().fen(), moves, session.bot_colour, session.end_game, max_depth, time_limit, node_limit, self.tt.name)
+        finally:
+            self.running -= 1
+            self.slots.release()
+
+        move_uci, score, depth, nodes, session.end_game, book_move, tt_probes, tt_hits = result
+        finished = time.monotonic()
+        self.latencies.append(finished - received)
+        self.counts["bot_moves"] += 1
+        self.counts["tt_probes"] += tt_probes
+        self.counts["tt_hits"] += tt_hits
+        #the first iteration of a search always finishes, so a very short deadline can be missed
+        if finished > deadline:
+            self.counts["late"] += 1
+        board.push_uci(move_uci)
+        response = self.state(session)
+        response.update({"move": move_uci, "score": score, "depth": depth, "nodes": nodes, "book_move": book_move,
+                         "time": round(finished - started, 3)})
+        return response
+
+    def state(self, session):
+        board = session.board
+        return {"fen": board.fen(), "moves": [move.uci() for move in board.move_stack], "turn": "white" if board.turn else "black",
+                "result": board.result() if board.is_game_over() else "*"}
+
+    def metrics(self):
+        return {"sessions": len(self.sessions), "workers": self.workers, "running": self.running, "queue_depth": self.waiting,
+                "max_queue": self.max_queue, "requests": self.counts["requests"], "bot_moves": self.counts["bot_moves"],
+                "rejected": self.counts["rejected"], "expired": self.counts["expired"], "late": self.counts["late"],
+                "errors": self.counts["errors"], "latency_ms": percentiles(self.latencies), "queue_wait_ms": percentiles(self.queue_waits),
+                "tt_hit_rate": round(self.counts["tt_hits"] / self.counts["tt_probes"], 3) if self.counts["tt_probes"] else 0,
+                "tt_usage": round(self.tt.usage(), 4)}
+
+    #drops games nobody has sent a request for in a while
+    async def expire_sessions(self):
+        while True:
+            await asyncio.sleep(min(self.session_timeout, 60))
+            now = time.monotonic()
+            for session_id, session in list(self.sessions.items()):
+                if now - session.last_used > self.session_timeout and not session.lock.locked():
+                    del self.sessions[session_id]
+
+    #reads requests from one connection, each is answered as soon as it is done so a slow bot move does not hold up the rest
+    async def serve_client(self, reader, writer):
+        write_lock = asyncio.Lock()
+        in_progress = asyncio.Semaphore(MAX_CLIENT_REQUESTS)
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                await in_progress.acquire()
+                task = asyncio.create_task(self.answer(line, writer, write_lock, in_progress))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def answer(self, line, writer, write_lock, in_progress):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ServiceError("requests are JSON objects")
+            request_id = request.get("id")
+            response = await self.handle(request)
+        except ServiceBusy as error:
+            response = {"error": str(error)}
+        except (ServiceError, ValueError) as error:
+            self.counts["errors"] += 1
+            response = {"error": str(error)}
+        except Exception as error:
+            #such as a worker process dying, the service carries on with the other requests
+            self.counts["errors"] += 1
+            response = {"error": "internal error: " + repr(error)}
+        finally:
+            in_progress.release()
+        response["id"] = request_id
+        async with write_lock:
+            writer.write((json.dumps(response) + "\n").encode())
+            await writer.drain()
+
+#median, 95th percentile and largest of a list of seconds, in milliseconds
+def percentiles(samples):
+    if not samples:
+        return {"p50": 0, "p95": 0, "max": 0}
+    ordered = sorted(samples)
+    return {"p50": round(ordered[len(ordered) // 2] * 1000, 1), "p95": round(ordered[int(len(ordered) * 0.95)] * 1000, 1),
+            "max": round(ordered[-1] * 1000, 1)}
+
+#bots kept by each engine worker process, one for each colour, shared by the games the worker searches for
+#positions are stored by their hash in the service's shared table, so what one game stores can be used by another
+#that reaches the same position in any worker, the keys of end game searches are kept apart from the others
+service_worker_bots = {}
+
+#searches the bot's move for a game in an engine worker process, given the game's first position and moves
+#returns the move, score, depth reached, positions searched, whether the bot now uses its end game evaluation,
+#whether the move came from the book and the search's transposition table probes and hits
+def search_session(fen, moves, colour, end_game, max_depth, time_limit, node_limit, tt_name):
+    if colour not in service_worker_bots:
+        service_worker_bots[colour] = ChessBot(colour, shared_tt=tt_name)
+    bot = service_worker_bots[colour]
+    bot.end_game = end_game
+
+    board = chess.Board(fen)
+    for move in moves:
+        board.push_uci(move)
+    tt_probes, tt_hits = bot.tt.probes, bot.tt.hits
+    score, move = bot.search(board, max_depth, time_limit, node_limit)
+    return (move.uci(), score, bot.depth_reached, bot.positions + bot.q_positions, bot.end_game, bot.book_move,
+            bot.tt.probes - tt_probes, bot.tt.hits - tt_hits)
+
+async def serve(host, port, unix_path, workers, max_queue, session_timeout, tt_size):
+    service = EngineService(workers, max_queue, session_timeout, tt_size)
+    if unix_path is not None:
+        server = await asyncio.start_unix_server(service.serve_client, unix_path)
+    else:
+        server = await asyncio.start_server(service.serve_client, host, port)
+    #kept on the service so the task is not garbage collected while the server runs, and is cancelled with it
+    if session_timeout is not None:
+        service.expiry_task = asyncio.create_task(service.expire_sessions())
+    print("serving on", unix_path if unix_path is not None else host + ":" + str(port), "with", workers, "engine workers", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if service.expiry_task is not None:
+            service.expiry_task.cancel()
+        service.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Plays many games at once for clients sending JSON lines over a socket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="path of a Unix socket to listen on instead of TCP")
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS, help="engine worker processes")
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE, help="bot moves that can wait for a worker before more are turned away")
+    parser.add_argument("--session-timeout", type=float, default=SESSION_TIMEOUT, help="seconds before an unused game is dropped, 0 to keep them")
+    parser.add_argument("--tt-size", type=int, default=TT_SIZE, help="buckets of the shared transposition table, 32 bytes each")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers, args.max_queue, args.session_timeout or None, args.tt_size))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
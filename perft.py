@@ -0,0 +1,142 @@
+import argparse
+import sys
+import time
+import concurrent.futures
+import chess #to help with chess rules
+from chess_engine import SearchBoard
+
+#perft counts the leaf positions of the legal move tree to a fixed depth, which measures move generation and
+#make/unmake on their own, without evaluation or pruning
+#it walks the tree the same way the bot's search does: python-chess generates and plays the moves while the
+#search board is updated with make/unmake alongside it
+
+#well known positions with their published leaf counts for depth 1, 2, ...
+REFERENCE_POSITIONS = {
+    "start": ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", [20, 400, 8902, 197281, 4865609, 119060324]),
+    "kiwipete": ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862, 4085603, 193690690]),
+    "position3": ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238, 674624, 11030083]),
+    "position4": ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467, 422333, 15833292]),
+    "position5": ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379, 2103487, 89941194]),
+}
+#deepest depth checked for each reference position by --check, kept small enough to run in well under a minute
+CHECK_DEPTH = 3
+
+#raised when the search board kept with make/unmake no longer matches the position it should hold
+class SearchBoardMismatch(Exception):
+    pass
+
+#compares the search board with one built fresh from the position, so a make/unmake bug fails the check
+#even when the leaf count is still right
+def verify(board, sb):
+    fresh = SearchBoard(board)
+    for name in ("squares", "material", "pst"):
+        if getattr(sb, name) != getattr(fresh, name):
+            moves = " ".join(move.uci() for move in board.move_stack) or "no moves"
+            raise SearchBoardMismatch(name + " differ after " + moves + " from " + board.root().fen())
+
+def perft(board, sb, depth, check_board=False):
+    if depth == 0:
+        if check_board:
+            verify(board, sb)
+        return 1
+    nodes = 0
+    for move in board.legal_moves:
+        undo = sb.make(move)
+        board.push(move)
+        nodes += perft(board, sb, depth - 1, check_board)
+        board.pop()
+        sb.unmake(move, undo)
+    return nodes
+
+#leaf count below one root move, run in a worker process when the root moves are split across a pool
+def perft_move(fen, move_uci, depth, check_board=False):
+    board = chess.Board(fen)
+    sb = SearchBoard(board)
+    move = chess.Move.from_uci(move_uci)
+    sb.make(move)
+    board.push(move)
+    return perft(board, sb, depth - 1, check_board)
+
+#leaf count below each root move, in generated order
+#with check_board the search board is compared with a fresh one at every leaf and after every root move is undone
+def divide(fen, depth, workers=1, check_board=False):
+    board = chess.Board(fen)
+    moves = [move for move in board.legal_moves]
+    if workers > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            counts = list(pool.map(perft_move, [fen] * len(moves), [move.uci() for move in moves], [depth] * len(moves), [check_board] * len(moves)))
+    else:
+        sb = SearchBoard(board)
+        counts = []
+        for move in moves:
+            undo = sb.make(move)
+            board.push(move)
+            counts.append(perft(board, sb, depth - 1, check_board))
+            board.pop()
+            sb.unmake(move, undo)
+            if check_board:
+                verify(board, sb)
+    return list(zip(moves, counts))
+
+#runs perft and prints the leaf count and leaf nodes per second, returns the leaf count
+def run(fen, depth, workers=1, show_divide=False, check_board=False):
+    start = time.perf_counter()
+    if depth == 0:
+        results = []
+        nodes = 1
+    else:
+        results = divide(fen, depth, workers, check_board)
+        nodes = sum(count for move, count in results)
+    elapsed = time.perf_counter() - start
+
+    if show_divide:
+        for move, count in results:
+            print(move.uci() + ":", count)
+        print()
+    print("depth", depth, "nodes", nodes, "time", str(round(elapsed, 3)) + "s", round(nodes / elapsed) if elapsed > 0 else 0, "nodes/s")
+    return nodes
+
+#checks every reference position against its published counts and the search board against a fresh one at every
+#leaf, returns True if they all match
+def check(max_depth=CHECK_DEPTH, workers=1):
+    passed = True
+    for name, (fen, counts) in REFERENCE_POSITIONS.items():
+        for depth in range(1, min(max_depth, len(counts)) + 1):
+            print(name.ljust(10), end=" ")
+            try:
+                nodes = run(fen, depth, workers, check_board=True)
+            except SearchBoardMismatch as error:
+                print()
+                print("FAILED:", name, "depth", depth, error)
+                passed = False
+                continue
+            if nodes != counts[depth - 1]:
+                print("FAILED:", name, "depth", depth, "expected", counts[depth - 1], "got", nodes)
+                passed = False
+    return passed
+
+def main():
+    parser = argparse.ArgumentParser(description="Counts the leaf positions of the legal move tree to measure move generation speed.")
+    parser.add_argument("--fen", help="position to count from, the starting position by default")
+    parser.add_argument("--position", choices=REFERENCE_POSITIONS.keys(), help="reference position to count from, checked against its published count")
+    parser.add_argument("--depth", type=int, help="depth to count to, 4 by default or " + str(CHECK_DEPTH) + " with --check")
+    parser.add_argument("--divide", action="store_true", help="print the count below each root move")
+    parser.add_argument("--workers", type=int, default=1, help="processes to split the root moves across")
+    parser.add_argument("--check", action="store_true", help="check every reference position up to --depth against its published counts")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if check(args.depth or CHECK_DEPTH, args.workers) else 1)
+    depth = args.depth if args.depth is not None else 4
+
+    if args.position is not None:
+        fen, counts = REFERENCE_POSITIONS[args.position]
+    else:
+        fen, counts = args.fen or chess.STARTING_FEN, None
+    nodes = run(fen, depth, args.workers, args.divide)
+    if counts is not None and 0 < depth <= len(counts) and nodes != counts[depth - 1]:
+        print("FAILED: expected", counts[depth - 1])
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import pygame #for the GUI
+
+#draws the game window of Chess Bot.py a frame at a time
+#everything that stays the same during a game is drawn once for each board orientation and kept as a background,
+#text is only rendered again when it changes, and each frame only redraws and updates the parts of the window that changed
+
+TEXT_COLOUR = (255, 255, 255)
+
+class Renderer:
+    #draw_background(surface, orientation) draws everything that never changes under the board onto the surface
+    #board_labels(orientation) returns the (surface, (x, y)) labels that are drawn on top of the board's squares
+    def __init__(self, screen, draw_background, board_labels, text_colour=TEXT_COLOUR):
+        self.screen = screen
+        self.draw_background = draw_background
+        self.board_labels = board_labels
+        self.text_colour = text_colour
+        #(background, labels) for each orientation, made the first time it is shown
+        self.layers = {}
+        self.orientation = None
+        self.background = None
+        self.labels = []
+        #piece images converted to the screen's pixel format, which makes them much faster to blit
+        self.images = {}
+        #what was drawn in the last frame, see invalidate
+        self.drawn_squares = None
+        self.drawn_text = {}
+        self.drawn_drag = None
+        self.drawn_overlay = None
+
+    #makes the next frame redraw the whole window
+    def invalidate(self):
+        self.orientation = None
+
+    def image(self, image):
+        converted = self.images.get(image)
+        if converted is None:
+            converted = image.convert_alpha()
+            self.images[image] = converted
+        return converted
+
+    def set_orientation(self, orientation):
+        if orientation not in self.layers:
+            background = pygame.Surface(self.screen.get_size()).convert()
+            self.draw_background(background, orientation)
+            labels = [(surface, surface.get_rect(topleft=pos)) for surface, pos in self.board_labels(orientation)]
+            self.layers[orientation] = (background, labels)
+        self.background, self.labels = self.layers[orientation]
+        self.orientation = orientation
+        self.drawn_squares = [[None for i in range(8)] for i in range(8)]
+        self.drawn_text = {}
+        self.drawn_drag = None
+        self.drawn_overlay = None
+
+    #draws one frame and updates the parts of the window that changed, returns the list of updated rectangles
+    #squares and pieces are the game's 8x8 lists, a piece being dragged is drawn on top of everything wherever it is
+    #overlay is drawn over the board (the pawn promotion choice), texts are (font, text, (x, y)) with one text per position
+    def draw(self, orientation, squares, pieces, dragged_piece=None, overlay=None, texts=()):
+        dirty = []
+        if orientation != self.orientation:
+            self.set_orientation(orientation)
+            self.screen.blit(self.background, (0, 0))
+            dirty.append(self.screen.get_rect())
+
+        #parts of the window something was taken off, which need the background and whatever was under it again
+        restored = []
+        drag = None
+        if dragged_piece is not None:
+            drag = (dragged_piece.img, pygame.Rect(dragged_piece.x, dragged_piece.y, dragged_piece.rect.width, dragged_piece.rect.height))
+        if self.drawn_drag is not None and self.drawn_drag != drag:
+            restored.append(self.drawn_drag[1])
+        if self.drawn_overlay is not None and overlay is not self.drawn_overlay:
+            restored.append(self.drawn_overlay.rect)
+
+        new_text = {}
+        for font, text, pos in texts:
+            new_text[pos] = (font, text)
+        for pos, (key, surface, rect) in list(self.drawn_text.items()):
+            if new_text.get(pos) != key:
+                restored.append(rect)
+                del self.drawn_text[pos]
+
+        for rect in restored:
+            self.screen.blit(self.background, rect, rect)
+            dirty.append(rect)
+
+        #squares whose colour or piece changed, or that were under something taken off
+        for i in range(8):
+            for j in range(8):
+                square = squares[i][j]
+                piece = pieces[i][j]
+                if piece != 0 and piece is not dragged_piece:
+                    state = (square.draw_col, piece.img, piece.x, piece.y)
+                else:
+                    state = (square.draw_col, None)
+                rect = pygame.Rect(square.x, square.y, square.size, square.size)
+                if state == self.drawn_squares[i][j] and rect.collidelist(restored) == -1:
+                    continue
+                self.drawn_squares[i][j] = state
+                self.screen.fill(square.draw_col, rect)
+                for surface, label_rect in self.labels:
+                    if label_rect.colliderect(rect):
+                        self.screen.blit(surface, label_rect)
+                if state[1] is not None:
+                    self.screen.blit(self.image(piece.img), (piece.x, piece.y))
+                dirty.append(rect)
+
+        #the dragged piece goes over the pieces and the overlay over both, like the text over everything
+        if drag is not None and (drag != self.drawn_drag or drag[1].collidelist(dirty) != -1):
+            self.screen.blit(self.image(drag[0]), drag[1])
+            dirty.append(drag[1])
+        self.drawn_drag = drag
+
+        if overlay is not None and (overlay is not self.drawn_overlay or overlay.rect.collidelist(dirty) != -1):
+            overlay.draw(self.screen)
+            dirty.append(overlay.rect)
+        self.drawn_overlay = overlay
+
+        #text is only rendered when it changes, and drawn again when something under it was redrawn
+        for pos, (font, text) in new_text.items():
+            drawn = self.drawn_text.get(pos)
+            if drawn is not None and drawn[2].collidelist(dirty) == -1:
+                continue
+            if drawn is not None:
+                surface = drawn[1]
+            else:
+                surface = font.render(text, False, self.text_colour)
+            rect = surface.get_rect(topleft=pos)
+            self.screen.blit(surface, rect)
+            self.drawn_text[pos] = ((font, text), surface, rect)
+            dirty.append(rect)
+
+        if dirty:
+            pygame.display.update(dirty)
+        return dirty
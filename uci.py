@@ -0,0 +1,207 @@
+import sys
+import threading
+import chess #to help with chess rules
+from chess_engine import ChessBot, INF, MAX_PLY, BOT_MAX_DEPTH, BOT_TIME_LIMIT, BOT_WORKERS, BOOK_PATH
+
+#UCI (universal chess interface) front end for the bot, reads commands on stdin and answers on stdout
+#lets chess GUIs and tools such as cutechess-cli play against the bot without pygame
+
+ENGINE_NAME = "Chess Bot"
+ENGINE_AUTHOR = "jason-j-wang"
+
+#when playing on a clock, uses this fraction of the remaining time plus half the increment for each move
+MOVES_TO_GO = 30
+
+class UCIEngine:
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        #stops two threads from writing a line at the same time
+        self.out_lock = threading.Lock()
+        self.board = chess.Board()
+        self.workers = BOT_WORKERS
+        self.own_book = True
+        self.book_path = BOOK_PATH
+        #the bot always searches for the side to move, so keeps one for each colour
+        self.bots = {}
+        self.thread = None
+        self.stop_event = None
+        #set by ponderhit, None unless the running search was started with go ponder
+        self.ponderhit_event = None
+
+    def send(self, line):
+        with self.out_lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    def get_bot(self, colour):
+        if colour not in self.bots:
+            self.bots[colour] = ChessBot(colour, workers=self.workers, book_path=self.book_path if self.own_book else None)
+        return self.bots[colour]
+
+    #handles one command, returns False once the engine should quit
+    def handle(self, line):
+        tokens = line.split()
+        if not tokens:
+            return True
+        command = tokens[0]
+
+        if command == "uci":
+            self.send("id name " + ENGINE_NAME)
+            self.send("id author " + ENGINE_AUTHOR)
+            self.send("option name Threads type spin default " + str(BOT_WORKERS) + " min 1 max 256")
+            #the GUI decides when to ponder, the option only tells it the engine can
+            self.send("option name Ponder type check default true")
+            self.send("option name OwnBook type check default true")
+            self.send("option name BookFile type string default " + BOOK_PATH)
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self.set_option(tokens)
+        elif command == "ucinewgame":
+            self.stop()
+            self.close_bots()
+            self.board = chess.Board()
+        elif command == "position":
+            self.stop()
+            self.board = self.parse_position(tokens)
+        elif command == "go":
+            self.go(tokens)
+        elif command == "ponderhit":
+            if self.ponderhit_event is not None:
+                self.ponderhit_event.set()
+        elif command == "stop":
+            self.stop()
+        elif command == "quit":
+            self.stop()
+            self.close_bots()
+            return False
+        return True
+
+    def set_option(self, tokens):
+        #setoption name <name> value <value>
+        if "name" not in tokens or "value" not in tokens:
+            return
+        name = " ".join(tokens[tokens.index("name") + 1:tokens.index("value")])
+        value = " ".join(tokens[tokens.index("value") + 1:])
+        if name.lower() == "threads":
+            self.workers = max(1, int(value))
+            self.close_bots()
+        elif name.lower() == "ownbook":
+            self.own_book = value.lower() == "true"
+            self.close_bots()
+        elif name.lower() == "bookfile":
+            self.book_path = value
+            self.close_bots()
+
+    #position [startpos | fen <fen>] [moves <move> ...]
+    def parse_position(self, tokens):
+        moves_index = tokens.index("moves") if "moves" in tokens else len(tokens)
+        if len(tokens) > 1 and tokens[1] == "fen":
+            board = chess.Board(" ".join(tokens[2:moves_index]))
+        else:
+            board = chess.Board()
+        for move in tokens[moves_index + 1:]:
+            board.push_uci(move)
+        return board
+
+    #go [ponder] [depth n] [nodes n] [movetime ms] [wtime ms] [btime ms] [winc ms] [binc ms] [movestogo n] [infinite]
+    #go ponder searches the position after the expected reply, the limits only start once ponderhit is sent
+    def go(self, tokens):
+        self.stop()
+        params = {}
+        for name in ("depth", "nodes", "movetime", "wtime", "btime", "winc", "binc", "movestogo"):
+            if name in tokens:
+                params[name] = int(tokens[tokens.index(name) + 1])
+
+        max_depth = params.get("depth", MAX_PLY)
+        node_limit = params.get("nodes")
+        time_limit = None
+        if "movetime" in params:
+            time_limit = params["movetime"] / 1000
+        elif "wtime" in params or "btime" in params:
+            remaining = params.get("wtime" if self.board.turn else "btime", 0)
+            increment = params.get("winc" if self.board.turn else "binc", 0)
+            moves_to_go = params.get("movestogo", MOVES_TO_GO)
+            time_limit = min(remaining / moves_to_go + increment / 2, remaining / 2) / 1000
+        elif "infinite" not in tokens and "depth" not in params and "nodes" not in params:
+            #a bare go uses the same budget as the GUI
+            max_depth = BOT_MAX_DEPTH
+            time_limit = BOT_TIME_LIMIT
+
+        self.stop_event = threading.Event()
+        self.ponderhit_event = threading.Event() if "ponder" in tokens else None
+        self.thread = threading.Thread(target=self.think, args=(self.board.copy(), max_depth, time_limit, node_limit, self.stop_event, self.ponderhit_event, "infinite" in tokens), daemon=True)
+        self.thread.start()
+
+    def think(self, board, max_depth, time_limit, node_limit, stop_event, ponderhit_event, infinite=False):
+        bot = self.get_bot(board.turn)
+        score, move = bot.search(board, max_depth, time_limit, node_limit, stop_event, ponderhit_event)
+        #bestmove cannot be sent while pondering, so a ponder search that finishes early waits for ponderhit or stop
+        if ponderhit_event is not None:
+            ponderhit_event.wait()
+        #nor during an infinite search, which can still finish early on a mate or a book move, until stop
+        if infinite:
+            stop_event.wait()
+
+        if bot.book_move:
+            self.send("info string book move")
+            self.send("bestmove " + move.uci())
+            return
+
+        #only a position with no legal moves is answered without a move, an unsearched score is never sent as a mate
+        no_moves = not any(board.legal_moves)
+        if no_moves:
+            score_text = "mate 0" if board.is_check() else "cp 0"
+        elif move is None:
+            score_text = "cp 0"
+        elif abs(score) >= INF:
+            #the search does not track how far away a mate is, so estimates it from the principal variation
+            mate_in = (len(bot.pv) + 1) // 2
+            score_text = "mate " + str(mate_in if score > 0 else -mate_in)
+        else:
+            score_text = "cp " + str(score)
+        nodes = bot.positions + bot.q_positions
+        info = "info depth " + str(bot.depth_reached) + " score " + score_text + " nodes " + str(nodes)
+        if bot.pv:
+            info += " pv " + " ".join(move.uci() for move in bot.pv)
+        self.send(info)
+
+        if no_moves:
+            #the position is already over
+            self.send("bestmove 0000")
+        elif move is None:
+            #the first iteration always finishes so this should not happen, but any legal move is better than none
+            self.send("bestmove " + next(iter(board.legal_moves)).uci())
+        elif len(bot.pv) >= 2:
+            #the expected reply, which the GUI can have the engine ponder on
+            self.send("bestmove " + move.uci() + " ponder " + bot.pv[1].uci())
+        else:
+            self.send("bestmove " + move.uci())
+
+    #stops a running search, which still answers with the best move it has found
+    def stop(self):
+        if self.thread is not None:
+            self.stop_event.set()
+            #a finished ponder search is waiting for this before it answers
+            if self.ponderhit_event is not None:
+                self.ponderhit_event.set()
+            self.thread.join()
+            self.thread = None
+            self.ponderhit_event = None
+
+    def close_bots(self):
+        for bot in self.bots.values():
+            bot.close()
+        self.bots = {}
+
+def main():
+    engine = UCIEngine()
+    for line in sys.stdin:
+        if not engine.handle(line):
+            break
+    engine.stop()
+    engine.close_bots()
+
+if __name__ == "__main__":
+    main()